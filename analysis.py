@@ -0,0 +1,186 @@
+"""Exact (analytic) evaluation of the bulb wheel games.
+
+Everything here is computed from a game's weights, prize poll and current bets, so
+no rounds need to be simulated. Profits are from the players' side of the table:
+the prizes paid out minus the total amount bet."""
+
+import math
+
+import numpy as np
+from scipy import optimize, sparse
+from scipy.sparse import linalg as splinalg
+
+import simulation as sim
+
+def round_outcomes(game: sim.Game) -> tuple[np.ndarray, np.ndarray]:
+    """Probability of each bulb being selected, and the players' net profit when it is."""
+    payout = np.asarray(game.prize_poll, dtype = np.int64) * game.book.winners()
+    return game.sampler.p, payout - game.stakes()
+
+def expected_value(game: sim.Game) -> float:
+    """Expected net profit of the players per round."""
+    p, net = round_outcomes(game)
+    return float(p @ net)
+
+def variance(game: sim.Game) -> float:
+    """Variance of the players' net profit per round."""
+    p, net = round_outcomes(game)
+    return float(p @ (net - p @ net) ** 2)
+
+def house_edge(game: sim.Game) -> float:
+    """Expected house profit as a fraction of the total amount bet."""
+    return -expected_value(game) / game.stakes()
+
+def win_rate(game: sim.Game) -> float:
+    """Probability that at least one bet is paid out in a round."""
+    return float(game.sampler.p[game.book.winners() > 0].sum())
+
+def profit_distribution(game: sim.Game, n: int) -> tuple[np.ndarray, np.ndarray]:
+    """Exact distribution of the players' cumulative net profit after `n` rounds.
+
+    The single-round distribution lives on an integer lattice, so the n-fold
+    convolution is done as an FFT power. Returns the possible profits and their
+    probabilities."""
+    p, net = round_outcomes(game)
+    low = int(net.min())
+    step = math.gcd(*[int(v) - low for v in net]) or 1
+
+    # Single-round probability mass on the lattice low, low + step, ...
+    pmf = np.bincount((net - low) // step, weights = p)
+    size = n * (len(pmf) - 1) + 1
+
+    dist = np.fft.irfft(np.fft.rfft(pmf, size) ** n, size)
+    dist = np.clip(dist, 0, None)
+    dist /= dist.sum()
+
+    return n * low + step * np.arange(size), dist
+
+def profit_band(game: sim.Game, rounds: np.ndarray, z: float = 1.96) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Expected cumulative profit after each of `rounds`, with a normal-approximation band of `z` standard deviations."""
+    rounds = np.asarray(rounds, dtype = np.float64)
+    mean = expected_value(game) * rounds
+    spread = z * np.sqrt(variance(game) * rounds)
+
+    return mean, mean - spread, mean + spread
+
+def ruin(game: sim.Game, balance: int, target: int|None = None) -> dict:
+    """Ruin probability and expected session length for a player holding all the bets on the table.
+
+    The player's balance moves by the round's net profit until it is absorbed:
+    either it drops below the total stake (the player is ruined), or it reaches
+    `target` or empties the house bank (`game.initial_bank`), whichever comes first.
+    The walk is solved as an absorbing Markov chain over the balance lattice with a
+    sparse linear solve.
+
+    Returns the probability of ruin, the probability of reaching the upper barrier,
+    the expected number of rounds, and the same three values for every balance on
+    the grid."""
+    p, net = round_outcomes(game)
+    stakes = game.stakes()
+    upper = balance + game.initial_bank if target is None else min(target, balance + game.initial_bank)
+
+    if stakes <= 0:
+        raise ValueError("The game needs at least one bet.")
+
+    if balance < stakes or balance >= upper:
+        absorbed = float(balance >= upper)
+        return {"ruin": 1 - absorbed, "upper": absorbed, "duration": 0.0,
+                "balances": np.array([balance]), "ruin_curve": np.array([1 - absorbed]),
+                "upper_curve": np.array([absorbed]), "duration_curve": np.array([0.0])}
+
+    # Transient balances share the starting balance's residue on the lattice.
+    step = math.gcd(*[abs(int(v)) for v in net])
+    low = balance - (balance - stakes) // step * step
+    balances = np.arange(low, upper, step)
+    size = len(balances)
+
+    rows, cols, probs = [], [], []
+    reach_upper = np.zeros(size)
+
+    for prob, move in zip(p, net // step):
+        if prob == 0:
+            continue
+
+        dest = np.arange(size) + int(move)
+        inside = (dest >= 0) & (dest < size)
+        rows.append(np.nonzero(inside)[0])
+        cols.append(dest[inside])
+        probs.append(np.full(inside.sum(), prob))
+        reach_upper[dest >= size] += prob
+
+    Q = sparse.csr_matrix(
+        (np.concatenate(probs), (np.concatenate(rows), np.concatenate(cols))), shape = (size, size)
+    )
+    A = (sparse.identity(size, format = "csr") - Q).tocsc()
+    solve = splinalg.factorized(A)
+
+    upper_curve = solve(reach_upper)
+    duration_curve = solve(np.ones(size))
+    start = (balance - low) // step
+
+    return {
+        "ruin": float(1 - upper_curve[start]), "upper": float(upper_curve[start]),
+        "duration": float(duration_curve[start]), "balances": balances,
+        "ruin_curve": 1 - upper_curve, "upper_curve": upper_curve, "duration_curve": duration_curve
+    }
+
+def _weight_bounds(game: sim.Game, min_p: float, max_p: float, max_deviation: float|None) -> list[tuple[float, float]]:
+    """Per-bulb probability bounds: `[min_p, max_p]`, within `max_deviation` of uniform."""
+    uniform = 1 / game.lights
+    spread = np.inf if max_deviation is None else max_deviation
+
+    return [(max(min_p, uniform - spread, 0.0), min(max_p, uniform + spread, 1.0))] * game.lights
+
+def edge_range(game: sim.Game, min_p: float = 0.0, max_p: float = 1.0,
+               max_deviation: float|None = None) -> tuple[float, float]:
+    """Lowest and highest house edge any weights within the bounds can give `game`'s bets."""
+    _, net = round_outcomes(game)
+    bounds = _weight_bounds(game, min_p, max_p, max_deviation)
+    edges = []
+
+    # The house edge is linear in the bulb probabilities, so both ends are linear programs.
+    for sign in (1, -1):
+        fit = optimize.linprog(sign * net, A_eq = np.ones((1, game.lights)), b_eq = [1.0], bounds = bounds,
+                               method = "highs")
+        if not fit.success:
+            raise ValueError("No weights satisfy the probability bounds.")
+
+        edges.append(-sign * fit.fun / game.stakes())
+
+    return edges[1], edges[0]
+
+def optimize_weights(game: sim.Game, house_edge: float, min_p: float = 0.0, max_p: float = 1.0,
+                     max_deviation: float|None = None, reference: list[float]|None = None) -> list[float]:
+    """Normalized weights that give `game`'s bets exactly `house_edge`.
+
+    Every bulb's probability stays within `[min_p, max_p]` and, if given, within
+    `max_deviation` of uniform. Among the weights that qualify, the result is the
+    one with the smallest total change from `reference` (the game's current
+    weights by default). Solved as a linear program on the exact expected value,
+    so no rounds are simulated."""
+    if game.stakes() <= 0:
+        raise ValueError("The game needs at least one bet.")
+
+    _, net = round_outcomes(game)
+    lights = game.lights
+    reference = game.sampler.p if reference is None else np.asarray(reference, dtype = np.float64) / np.sum(reference)
+
+    # Variables are the probabilities p and their absolute changes t from the
+    # reference: minimize sum(t) with t >= |p - reference|.
+    eye = np.eye(lights)
+    fit = optimize.linprog(
+        np.concatenate((np.zeros(lights), np.ones(lights))),
+        A_ub = np.block([[eye, -eye], [-eye, -eye]]), b_ub = np.concatenate((reference, -reference)),
+        A_eq = np.block([[np.ones((1, lights)), np.zeros((1, lights))], [net[None, :], np.zeros((1, lights))]]),
+        b_eq = [1.0, -house_edge * game.stakes()],
+        bounds = _weight_bounds(game, min_p, max_p, max_deviation) + [(0, None)] * lights,
+        method = "highs"
+    )
+
+    if not fit.success:
+        low, high = edge_range(game, min_p, max_p, max_deviation)
+        raise ValueError(f"A house edge of {house_edge:.2%} is out of reach; these bounds allow {low:.2%} to {high:.2%}.")
+
+    p = np.clip(fit.x[:lights], 0, None)
+    return list(p / p.sum())
+
@@ -0,0 +1,123 @@
+"""Streaming fairness audit of a wheel's observed outcomes.
+
+An `Audit` is fed selected-bulb indices in chunks, from `Simulator` runs, from
+`Game.play()` or from a real wheel's logs, and keeps only per-bulb counts. From
+those it tests the observed frequencies against the game's declared weights
+(chi-square and G-test, per-bulb z-scores) and estimates the house edge the wheel
+is actually delivering for the bets on the table."""
+
+import os
+
+import numpy as np
+from scipy import stats
+
+import simulation as sim
+import analysis
+
+class Audit:
+    """Per-bulb outcome counts checked against the declared weights of `game`."""
+    def __init__(self, game: sim.Game):
+        self.p, self.net = analysis.round_outcomes(game)
+        self.stakes = game.stakes()
+        self.declared_house_edge = analysis.house_edge(game)
+        self.counts = np.zeros(game.lights, dtype = np.int64)
+        self.n = 0
+
+    def update(self, selected: np.ndarray) -> None:
+        """Adds a chunk of selected-bulb indices."""
+        selected = np.asarray(selected)
+        if len(selected) == 0:
+            return
+
+        if selected.min() < 0 or selected.max() >= len(self.counts):
+            raise ValueError(f"Selected bulbs must be between 0 and {len(self.counts) - 1}.")
+
+        self.counts += np.bincount(selected, minlength = len(self.counts))
+        self.n += len(selected)
+
+    def feed(self, chunks) -> "Audit":
+        """Adds every chunk of an iterable, e.g. `(s for s, _ in simulator.chunks())`."""
+        for selected in chunks:
+            self.update(selected)
+
+        return self
+
+    def expected(self) -> np.ndarray:
+        return self.n * self.p
+
+    def chi_square(self) -> tuple[float, float]:
+        """Pearson's chi-square statistic and its p-value."""
+        expected = self.expected()
+        possible = self.p > 0
+
+        # A bulb that should never be selected but was fails the audit outright.
+        if self.counts[~possible].any():
+            return float("inf"), 0.0
+
+        statistic = float((((self.counts - expected)[possible]) ** 2 / expected[possible]).sum())
+        return statistic, float(stats.chi2.sf(statistic, possible.sum() - 1))
+
+    def g_test(self) -> tuple[float, float]:
+        """G-test (log-likelihood ratio) statistic and its p-value."""
+        expected = self.expected()
+        possible = self.p > 0
+
+        if self.counts[~possible].any():
+            return float("inf"), 0.0
+
+        seen = self.counts > 0
+        statistic = float(2 * (self.counts[seen] * np.log(self.counts[seen] / expected[seen])).sum())
+        return statistic, float(stats.chi2.sf(statistic, possible.sum() - 1))
+
+    def z_scores(self) -> np.ndarray:
+        """Standardized deviation of every bulb's count from its expected count (0 for impossible bulbs)."""
+        spread = np.sqrt(self.n * self.p * (1 - self.p))
+        with np.errstate(divide = "ignore", invalid = "ignore"):
+            z = (self.counts - self.expected()) / spread
+
+        return np.where(spread > 0, z, 0.0)
+
+    def house_edge(self) -> float:
+        """House edge delivered by the observed outcomes, for the bets on the table."""
+        return -float(self.counts @ self.net) / (self.n * self.stakes)
+
+    def half_width(self, z: float = 1.96) -> float:
+        """Half-width of the confidence interval of `house_edge()` (95% by default)."""
+        freq = self.counts / self.n
+        return z * float(np.sqrt(freq @ (self.net - freq @ self.net) ** 2 / self.n)) / self.stakes
+
+    def report(self) -> dict:
+        chi2, chi2_p = self.chi_square()
+        g, g_p = self.g_test()
+
+        return {
+            "rounds": self.n, "chi_square": chi2, "chi_square_p": chi2_p, "g_test": g, "g_test_p": g_p,
+            "z_scores": self.z_scores(), "house_edge": self.house_edge(), "half_width": self.half_width(),
+            "declared_house_edge": self.declared_house_edge
+        }
+
+    def ingest(self, path: str, column: str = "selected", chunk_rows: int = 1_000_000) -> "Audit":
+        """Adds the outcomes logged in `path`, reading `chunk_rows` rows at a time.
+
+        `path` is a `.npy` file of bulb indices, a trace directory written by
+        `Simulator.record()`, or a CSV file with a `column` of bulb indices (such
+        as the command line's `.csv` output)."""
+        if os.path.isdir(path):
+            path = os.path.join(path, "selected.npy")
+
+        if path.endswith(".npy"):
+            outcomes = np.load(path, mmap_mode = "r")
+            for start in range(0, len(outcomes), chunk_rows):
+                self.update(np.asarray(outcomes[start:start + chunk_rows]))
+
+            return self
+
+        import pandas as pd
+
+        reader = pd.read_csv(path, usecols = [column], dtype = {column: np.int64}, chunksize = chunk_rows,
+                             engine = "c")
+        with reader:
+            for frame in reader:
+                self.update(frame[column].to_numpy())
+
+        return self
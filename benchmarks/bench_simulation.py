@@ -0,0 +1,225 @@
+"""Benchmark suite for the simulation engine.
+
+Measures throughput (rounds per second), per-spin latency percentiles and peak
+resident memory of the game models, the simulator and the result aggregation
+used by the Simulate page, and the cold start of the headless command line.
+Every case runs in a fresh worker process so its peak RSS is its own.
+
+    python benchmarks/bench_simulation.py --out bench.json
+    python benchmarks/bench_simulation.py --quick --baseline bench.json
+
+With `--baseline`, cases whose throughput dropped by more than `--tolerance`
+against the stored results are flagged and the exit status is 1."""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+import simulation as sim
+import plotting
+
+PRIZE_POLL = [20, 50, 100, 200, 500, 750, 1000]
+
+def make_game(kind: str, lights: int, players: int = 1) -> sim.Game:
+    prize_poll = [PRIZE_POLL[i % len(PRIZE_POLL)] for i in range(lights)]
+
+    if kind == "fair":
+        game = sim.FairGame(lights, prize_poll = prize_poll)
+    else:
+        weights = np.arange(lights, 0, -1, dtype = np.float64)
+        game = sim.TweakedGame(lights, list(weights / weights.sum()), prize_poll = prize_poll)
+
+    for p in range(players):
+        game.bet(p, 250, p % lights)
+
+    return game
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / (1 << 20)
+
+def bench_play(kind: str, lights: int, rounds: int, players: int = 1) -> dict:
+    """`Game.play()`, one spin at a time."""
+    game = make_game(kind, lights, players)
+    times = np.empty(rounds)
+
+    for i in range(rounds):
+        start = time.perf_counter()
+        game.play()
+        times[i] = time.perf_counter() - start
+
+    return {
+        "rounds_per_sec": rounds / times.sum(),
+        "latency_us": {f"p{q}": float(np.percentile(times, q) * 1e6) for q in (50, 90, 99)}
+    }
+
+def bench_simulate(kind: str, lights: int, rounds: int) -> dict:
+    """`Simulator.simulate()`, the round-by-round generator."""
+    simulator = sim.Simulator(make_game(kind, lights), rounds)
+    start = time.perf_counter()
+    for _ in simulator.simulate():
+        pass
+
+    return {"rounds_per_sec": rounds / (time.perf_counter() - start)}
+
+def bench_run(kind: str, lights: int, rounds: int) -> dict:
+    """`Simulator.run()`, the batch mode."""
+    simulator = sim.Simulator(make_game(kind, lights), rounds)
+    start = time.perf_counter()
+    simulator.run()
+
+    return {"rounds_per_sec": rounds / (time.perf_counter() - start)}
+
+def bench_bet(lights: int, players: int) -> dict:
+    """Placing (and replacing) bets for many players, then settling a spin."""
+    game = make_game("fair", lights)
+    start = time.perf_counter()
+
+    for p in range(players):
+        game.bet(p, 250, p % lights)
+    for p in range(players):
+        game.bet(p, 100, p % lights)
+
+    elapsed = time.perf_counter() - start
+    spin = bench_play("fair", lights, 1000, players)
+
+    return {"bets_per_sec": 2 * players / elapsed, "rounds_per_sec": spin["rounds_per_sec"], "latency_us": spin["latency_us"]}
+
+def bench_aggregate(lights: int, rounds: int) -> dict:
+    """The Simulate page's aggregation: totals, win counts, house edge and the chart envelope."""
+    result = sim.Simulator(make_game("tweaked", lights), rounds).run()
+    start = time.perf_counter()
+
+    result.total_profit()
+    result.wins()
+    result.win_rate()
+    result.house_edge()
+    result.hit_counts()
+    plotting.profit_envelope(result)
+
+    return {"rounds_per_sec": rounds / (time.perf_counter() - start)}
+
+def bench_cold_start(runs: int) -> dict:
+    """`python -m simulation run --rounds 1` in a fresh interpreter; "rounds" are whole invocations."""
+    times = np.empty(runs)
+
+    for i in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "simulation", "run", "--rounds", "1"], cwd = ROOT,
+                       stdout = subprocess.DEVNULL, check = True)
+        times[i] = time.perf_counter() - start
+
+    return {
+        "rounds_per_sec": runs / times.sum(),
+        "latency_us": {f"p{q}": float(np.percentile(times, q) * 1e6) for q in (50, 90, 99)}
+    }
+
+CASES = {
+    "play": bench_play,
+    "simulate": bench_simulate,
+    "run": bench_run,
+    "bet": bench_bet,
+    "aggregate": bench_aggregate,
+    "cold_start": bench_cold_start
+}
+
+def _run_case(args):
+    name, params = args
+    before = peak_rss_mb()
+    result = CASES[name](**params)
+    result["peak_rss_mb"] = peak_rss_mb()
+    result["rss_before_mb"] = before
+
+    return result
+
+def cases(quick: bool, max_rounds: int) -> list[tuple[str, dict]]:
+    lights = [12, 24] if quick else [12, 18, 24]
+    batch_rounds = [r for r in ([10 ** 4, 10 ** 6] if quick else [10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7, 10 ** 8]) if r <= max_rounds]
+    players = [10, 1000] if quick else [10, 1000, 10000]
+    spins = 2000 if quick else 20000
+
+    selected = []
+    for n in lights:
+        for kind in ("fair", "tweaked"):
+            selected.append(("play", {"kind": kind, "lights": n, "rounds": spins}))
+            selected.append(("simulate", {"kind": kind, "lights": n, "rounds": spins}))
+            selected += [("run", {"kind": kind, "lights": n, "rounds": r}) for r in batch_rounds]
+
+        selected += [("bet", {"lights": n, "players": p}) for p in players]
+        selected += [("aggregate", {"lights": n, "rounds": r}) for r in batch_rounds]
+
+    selected.append(("cold_start", {"runs": 5 if quick else 20}))
+    return selected
+
+def case_key(name: str, params: dict) -> str:
+    return name + "[" + ",".join(f"{k}={v}" for k, v in params.items()) + "]"
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Cases whose throughput dropped by more than `tolerance` against the baseline."""
+    regressions = []
+
+    for key, result in results.items():
+        old = baseline.get("results", {}).get(key)
+        if old is None:
+            continue
+
+        ratio = result["rounds_per_sec"] / old["rounds_per_sec"]
+        if ratio < 1 - tolerance:
+            regressions.append(f"{key}: {old['rounds_per_sec']:.0f} -> {result['rounds_per_sec']:.0f} rounds/s ({ratio:.0%})")
+
+    return regressions
+
+def main(argv: list[str]|None = None) -> int:
+    parser = argparse.ArgumentParser(description = __doc__.splitlines()[0])
+    parser.add_argument("--quick", action = "store_true", help = "smaller sweep for CI")
+    parser.add_argument("--max-rounds", type = float, default = 1e8, help = "largest batch run")
+    parser.add_argument("--out", help = "write results to this JSON file")
+    parser.add_argument("--baseline", help = "compare against a stored results file")
+    parser.add_argument("--tolerance", type = float, default = 0.2, help = "allowed throughput drop (fraction)")
+    args = parser.parse_args(argv)
+
+    selected = cases(args.quick, int(args.max_rounds))
+    results = {}
+
+    # One fresh process per case, so peak RSS is not inherited from earlier cases.
+    with ProcessPoolExecutor(1, max_tasks_per_child = 1) as pool:
+        for (name, params), result in zip(selected, pool.map(_run_case, selected)):
+            key = case_key(name, params)
+            results[key] = result
+            print(f"{key:<55} {result['rounds_per_sec']:>14,.0f} rounds/s {result['peak_rss_mb']:>8.1f} MB")
+
+    report = {
+        "meta": {"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+                 "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": results
+    }
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent = 2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+
+        for line in regressions:
+            print("REGRESSION", line)
+
+        return 1 if regressions else 0
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""Content-addressed cache of simulation results.
+
+Results are keyed on a stable hash of everything that determines a run: the
+number of lights, weights, prize poll, bets, seed, round count and chunk size.
+A byte-bounded in-memory LRU sits in front of an optional on-disk tier of
+compressed `.npz` files with its own byte budget. One cache can be shared by
+several threads (e.g. every Streamlit session)."""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import simulation as sim
+
+def result_key(game: sim.Game, n: int, random_seed: int, chunk_size: int) -> str:
+    """Stable hash of the parameters of a batch run."""
+    params = {
+        "lights": game.lights,
+        "weights": [float(w) for w in game.weights],
+        "prize_poll": [int(p) for p in game.prize_poll],
+        "bets": sorted(game.players),
+        "seed": int(random_seed),
+        "rounds": int(n),
+        "chunk_size": int(chunk_size)
+    }
+
+    return hashlib.sha256(json.dumps(params, sort_keys = True).encode()).hexdigest()
+
+def result_size(result: sim.SimulationResult) -> int:
+    return sum([a.nbytes for a in (result.selected, result.payout, result.bank_delta, result.player_net)])
+
+def write_entry(directory: str, key: str, result: sim.SimulationResult) -> None:
+    """Writes the disk-tier entry of `result`, e.g. from the worker process that computed it."""
+    # Write to a temporary file first so a crash never leaves a partial entry.
+    fd, tmp = tempfile.mkstemp(dir = directory, suffix = ".tmp")
+    with os.fdopen(fd, "wb") as f:
+        np.savez_compressed(f, selected = result.selected, payout = result.payout,
+                            stakes = result.stakes, lights = result.lights)
+    os.replace(tmp, os.path.join(directory, key + ".npz"))
+
+class ResultCache:
+    """Two-tier (memory, then disk) cache of `SimulationResult`s."""
+    def __init__(self, memory_bytes: int = 256 << 20, directory: str|None = None, disk_bytes: int = 1 << 30):
+        self.memory_bytes = memory_bytes
+        self.directory = directory
+        self.disk_bytes = disk_bytes
+        self.memory = OrderedDict()
+        self.memory_used = 0
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok = True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "memory_hits": self.hits["memory"], "disk_hits": self.hits["disk"], "misses": self.misses,
+                "memory_entries": len(self.memory), "memory_bytes": self.memory_used
+            }
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".npz")
+
+    def get(self, key: str) -> sim.SimulationResult|None:
+        with self._lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.hits["memory"] += 1
+                return self.memory[key]
+
+        result = self._load(key)
+
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits["disk"] += 1
+                self._remember(key, result)
+
+        return result
+
+    def _load(self, key: str) -> sim.SimulationResult|None:
+        """Reads an entry from the disk tier, or returns None if it is not (or no longer) there."""
+        if self.directory is None:
+            return None
+
+        # Another thread may evict the file at any point, which is just a miss.
+        try:
+            with np.load(self._path(key)) as data:
+                result = sim.SimulationResult(data["selected"], data["payout"], int(data["stakes"]), int(data["lights"]))
+
+            # Touch the file so disk eviction is least-recently-used too.
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            return None
+
+        return result
+
+    def put(self, key: str, result: sim.SimulationResult, written: bool = False) -> None:
+        """Adds `result`; `written` tells that its disk entry was already written with `write_entry()`."""
+        with self._lock:
+            self._remember(key, result)
+
+        if self.directory is not None:
+            if not written:
+                write_entry(self.directory, key, result)
+
+            with self._lock:
+                self._evict_disk()
+
+    def run(self, simulator: sim.Simulator, n: int|None = None, chunk_size: int = 1_000_000, workers: int = 1) -> sim.SimulationResult:
+        """`simulator.run()`, served from the cache when the same run was done before."""
+        n = simulator.n_of_sims if n is None else n
+        key = result_key(simulator.game, n, simulator.random_seed, chunk_size)
+        result = self.get(key)
+
+        if result is None:
+            result = simulator.run(n, chunk_size, workers)
+            self.put(key, result)
+        else:
+            simulator.apply(result)
+
+        return result
+
+    def _remember(self, key: str, result: sim.SimulationResult) -> None:
+        # Called with the lock held, like `_evict_disk()`.
+        size = result_size(result)
+        if size > self.memory_bytes:
+            return
+
+        if key in self.memory:
+            self.memory_used -= result_size(self.memory.pop(key))
+
+        self.memory[key] = result
+        self.memory_used += size
+
+        while self.memory_used > self.memory_bytes:
+            _, old = self.memory.popitem(last = False)
+            self.memory_used -= result_size(old)
+
+    def _evict_disk(self) -> None:
+        entries = [os.path.join(self.directory, f) for f in os.listdir(self.directory) if f.endswith(".npz")]
+        entries.sort(key = os.path.getmtime)
+        used = sum([os.path.getsize(f) for f in entries])
+
+        while used > self.disk_bytes and entries:
+            oldest = entries.pop(0)
+            used -= os.path.getsize(oldest)
+            os.remove(oldest)
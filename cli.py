@@ -0,0 +1,224 @@
+"""Headless command line for batch simulations, for cron jobs and CI.
+
+    python -m simulation run --lights 12 --weights 3,3,2,2,1,1,1,1,1,1,1,1 --rounds 1e8 --seed 42 --out results.parquet
+
+Rounds are streamed chunk by chunk into `--out` (`.parquet`, `.csv`, or any other
+path for a memory-mapped trace directory, see `simulation.Trace`) and a summary
+is printed at the end. Only NumPy is imported to simulate: pyarrow is loaded for
+`.parquet` output only, and the analytic model (which needs SciPy) for `--exact`
+only."""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+import simulation as sim
+
+def _count(text: str) -> int:
+    """Round counts such as `1e8` or `100_000`."""
+    return int(float(text))
+
+def _numbers(kind):
+    def parse(text: str) -> list:
+        return [kind(v) for v in text.split(",")]
+
+    return parse
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog = "python -m simulation", description = "Bulb wheel batch simulations.")
+    commands = parser.add_subparsers(dest = "command", required = True)
+
+    run = commands.add_parser("run", help = "play a game for a number of rounds")
+    run.add_argument("--lights", type = int, default = 12, help = "number of bulbs")
+    run.add_argument("--weights", type = _numbers(float), help = "comma-separated bulb weights (default: a fair wheel)")
+    run.add_argument("--prize-poll", type = _numbers(int), help = "comma-separated prizes (default: drawn from the seed)")
+    run.add_argument("--stake", type = int, default = 250, help = "amount bet every round")
+    run.add_argument("--bet", type = int, default = 0, help = "bulb the bet is placed on")
+    run.add_argument("--rounds", type = _count, default = 1_000_000, help = "rounds to play, e.g. 1e8")
+    run.add_argument("--seed", type = int, default = 42)
+    run.add_argument("--chunk-size", type = _count, default = 1_000_000, help = "rounds per chunk")
+    run.add_argument("--workers", type = int, default = 1, help = "worker processes")
+    run.add_argument("--out", help = "stream every round to this file or directory")
+    run.add_argument("--checkpoint", help = "checkpoint to this JSON file; an existing one is resumed or extended "
+                                            "(single process, statistics only)")
+    run.add_argument("--exact", action = "store_true", help = "add the analytic values to the summary (needs SciPy)")
+    run.add_argument("--json", action = "store_true", help = "print the summary as JSON")
+
+    return parser
+
+def make_game(args: argparse.Namespace) -> sim.Game:
+    """The game described by the command line arguments, with the bet placed."""
+    # Same prize poll as the Simulate page for the same seed.
+    prize_poll = args.prize_poll or [int(p) for p in np.random.default_rng(args.seed).choice(sim.Game.c, args.lights)]
+
+    if args.lights < 12:
+        raise ValueError("The wheel has at least 12 bulbs.")
+
+    if len(prize_poll) != args.lights or (args.weights and len(args.weights) != args.lights):
+        raise ValueError(f"--prize-poll and --weights need one value per bulb ({args.lights}).")
+
+    if args.weights:
+        game = sim.TweakedGame(args.lights, args.weights, prize_poll = prize_poll)
+    else:
+        game = sim.FairGame(args.lights, prize_poll = prize_poll)
+
+    game.bet(1, args.stake, args.bet)
+    return game
+
+def _digits(values: np.ndarray, width: int) -> tuple[np.ndarray, np.ndarray]:
+    """ASCII digits of non-negative integers as a `len(values) x width` byte matrix, and a mask of the ones to print."""
+    dtype = np.uint32 if width <= 9 else np.uint64
+    values = values.astype(dtype, copy = False)[:, None]
+    powers = (10 ** np.arange(width - 1, -1, -1)).astype(dtype)
+
+    used = values >= powers
+    used[:, -1] = True
+    return (values // powers % 10).astype(np.uint8) + ord("0"), used
+
+class CsvWriter:
+    """Appends rounds to a CSV file as `round,selected,payout` rows.
+
+    Each chunk is formatted at once: the digits of every column go into one byte
+    matrix, and the rows are the bytes left after masking out leading zeros."""
+    def __init__(self, path: str):
+        self.file = open(path, "wb")
+        self.file.write(b"round,selected,payout\n")
+        self.rounds = 0
+
+    def write(self, selected: np.ndarray, payout: np.ndarray) -> None:
+        n = len(selected)
+        if n == 0:
+            return
+
+        columns = [
+            _digits(np.arange(self.rounds, self.rounds + n), len(str(self.rounds + n - 1))),
+            _digits(selected, len(str(int(selected.max())))),
+            _digits(payout, len(str(int(payout.max()))))
+        ]
+        text = np.empty((n, sum(d.shape[1] + 1 for d, _ in columns)), dtype = np.uint8)
+        keep = np.ones(text.shape, dtype = bool)
+
+        start = 0
+        for (digits, used), end in zip(columns, b",,\n"):
+            stop = start + digits.shape[1]
+            text[:, start:stop] = digits
+            keep[:, start:stop] = used
+            text[:, stop] = end
+            start = stop + 1
+
+        self.file.write(text[keep].tobytes())
+        self.rounds += n
+
+    def close(self) -> None:
+        self.file.close()
+
+class ParquetWriter:
+    """Appends rounds to a Parquet file, one row group per chunk."""
+    def __init__(self, path: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Writing .parquet files needs pyarrow (pip install pyarrow).")
+
+        self.pa = pa
+        self.writer = pq.ParquetWriter(path, pa.schema([("selected", pa.int8()), ("payout", pa.int64())]))
+
+    def write(self, selected: np.ndarray, payout: np.ndarray) -> None:
+        self.writer.write_table(self.pa.table({"selected": selected.astype(np.int8), "payout": payout.astype(np.int64)}))
+
+    def close(self) -> None:
+        self.writer.close()
+
+WRITERS = {".csv": CsvWriter, ".parquet": ParquetWriter}
+
+def run(args: argparse.Namespace, game: sim.Game) -> dict:
+    """Plays `game`, streaming rounds to `args.out`, and returns the summary."""
+    bank = game.initial_bank
+    simulator = sim.Simulator(game, args.rounds, args.seed)
+    resumed = 0
+    start = time.perf_counter()
+
+    if args.checkpoint:
+        if os.path.exists(args.checkpoint):
+            with open(args.checkpoint) as f:
+                resumed = json.load(f)["rounds"]
+
+        stats = simulator.run_resumable(args.checkpoint, args.rounds, args.chunk_size)
+        bank = game.initial_bank + stats.total
+    elif args.out and os.path.splitext(args.out)[1] not in WRITERS:
+        stats = simulator.record(args.out, args.rounds, args.chunk_size, args.workers).stats()
+    else:
+        stats = sim.RunningStats(game.stakes(), game.lights)
+        writer = WRITERS[os.path.splitext(args.out)[1]](args.out) if args.out else None
+
+        try:
+            for selected, payout in simulator.chunks(args.rounds, args.chunk_size, workers = args.workers):
+                stats.update(selected, payout)
+                if writer is not None:
+                    writer.write(selected, payout)
+        finally:
+            if writer is not None:
+                writer.close()
+
+    seconds = time.perf_counter() - start
+    summary = {
+        "rounds": stats.n, "seconds": seconds, "rounds_per_sec": (stats.n - resumed) / seconds,
+        "win_rate": stats.win_rate(), "house_edge": stats.house_edge(), "half_width": stats.half_width(),
+        "player_profit": stats.total, "house_bank": bank - stats.total,
+        "hits": stats.hits.tolist(), "out": args.out
+    }
+
+    if args.exact:
+        import analysis
+        summary["exact_win_rate"] = analysis.win_rate(game)
+        summary["exact_house_edge"] = analysis.house_edge(game)
+
+    return summary
+
+def format_summary(summary: dict) -> str:
+    lines = [
+        f"rounds          {summary['rounds']:,}",
+        f"time            {summary['seconds']:.2f} s ({summary['rounds_per_sec']:,.0f} rounds/s)",
+        f"win rate        {summary['win_rate'] * 100:.4f}%",
+        f"house edge      {summary['house_edge'] * 100:.4f}% ± {summary['half_width'] * 100:.4f}%",
+        f"player profit   ${summary['player_profit']:,}",
+        f"house bank      ${summary['house_bank']:,}"
+    ]
+
+    if "exact_house_edge" in summary:
+        lines.append(f"exact win rate  {summary['exact_win_rate'] * 100:.4f}%")
+        lines.append(f"exact edge      {summary['exact_house_edge'] * 100:.4f}%")
+
+    if summary["out"]:
+        lines.append(f"written to      {summary['out']}")
+
+    return "\n".join(lines)
+
+def main(argv: list[str]|None = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.rounds < 1 or args.chunk_size < 1:
+        parser.error("--rounds and --chunk-size must be at least 1.")
+
+    if not 0 <= args.bet < args.lights:
+        parser.error(f"--bet must be a bulb from 0 to {args.lights - 1}.")
+
+    if args.checkpoint and args.out:
+        parser.error("--checkpoint keeps statistics only and cannot be combined with --out.")
+
+    if args.checkpoint and args.workers > 1:
+        parser.error("--checkpoint plays its chunks in order in one process and cannot be combined with --workers.")
+
+    try:
+        game = make_game(args)
+        summary = run(args, game)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print(json.dumps(summary) if args.json else format_summary(summary))
+    return 0
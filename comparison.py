@@ -0,0 +1,101 @@
+"""Paired Fair vs Tweaked comparisons with variance reduction.
+
+Both games are driven from the same uniform draws through their inverse CDFs
+(common random numbers). The CDFs run over the bulbs sorted by the players' net
+profit, so a high draw means a good round in both games and the shared noise
+cancels out of the difference.
+Antithetic draws and a control variate on the fair game's known expected value
+can be layered on top."""
+
+import numpy as np
+
+import simulation as sim
+import analysis
+
+def _quantile_function(game: sim.Game) -> tuple[sim.BulbSampler, np.ndarray]:
+    """Sampler over the bulbs ordered by net profit, with the net profit of each position."""
+    p, net = analysis.round_outcomes(game)
+    order = np.argsort(net, kind = "stable")
+    return sim.BulbSampler(p[order]), net[order]
+
+def compare(fair: sim.Game, tweaked: sim.Game, n: int, random_seed: int = 42, chunk_size: int = 1_000_000,
+            antithetic: bool = False, control: bool = False, z: float = 1.96, progress = None) -> dict:
+    """Estimates the difference in the players' net profit per round (tweaked minus fair) over `n` rounds of each game.
+
+    Returns the estimate, its confidence interval half-width, the rounds played,
+    and the variance reduction factor against two independent runs of the same
+    length: how many times fewer rounds reach the same confidence interval.
+
+    With `antithetic`, each draw u is paired with 1 - u; a chunk of odd size
+    plays its last round with a plain draw, so exactly `n` rounds are played.
+
+    `progress`, if given, is called with the rounds played so far after every
+    chunk, like in `Simulator.run()`; if it returns False the comparison stops
+    there and raises `simulation.Cancelled`."""
+    if n < (2 if antithetic else 1):
+        raise ValueError(f"Need at least {2 if antithetic else 1} rounds, got {n}.")
+
+    fair_sampler, net_fair = _quantile_function(fair)
+    tweaked_sampler, net_tweaked = _quantile_function(tweaked)
+    ev_fair = analysis.expected_value(fair)
+
+    # Running sums of the difference d, the centered fair profit x and the two marginals.
+    keys = ("d", "dd", "x", "xx", "dx", "f", "ff", "t", "tt")
+    sums = dict.fromkeys(keys, 0.0)
+    samples = rounds = 0
+
+    for index, start in enumerate(range(0, n, chunk_size)):
+        size = min(chunk_size, n - start)
+        rng = np.random.default_rng(np.random.SeedSequence(random_seed, spawn_key = (index,)))
+        u = rng.random(-(-size // 2) if antithetic else size)
+
+        f = net_fair[fair_sampler.from_uniform(u)]
+        t = net_tweaked[tweaked_sampler.from_uniform(u)]
+        d = (t - f).astype(np.float64)
+        x = f - ev_fair
+
+        if antithetic:
+            # The leftover round of an odd chunk is paired with itself.
+            v = 1 - u
+            if size % 2:
+                v[-1] = u[-1]
+
+            f2 = net_fair[fair_sampler.from_uniform(v)]
+            t2 = net_tweaked[tweaked_sampler.from_uniform(v)]
+            d = (d + t2 - f2) / 2
+            x = (x + f2 - ev_fair) / 2
+
+        for key, values in (("d", d), ("dd", d * d), ("x", x), ("xx", x * x), ("dx", d * x),
+                            ("f", f), ("ff", f * f), ("t", t), ("tt", t * t)):
+            sums[key] += float(values.sum())
+
+        samples += len(u)
+        rounds += size
+
+        if progress is not None and progress(rounds) is False:
+            raise sim.Cancelled(f"Stopped after {rounds} of {n} rounds.")
+
+    mean = {key: value / samples for key, value in sums.items()}
+    var_d = mean["dd"] - mean["d"] ** 2
+    var_x = mean["xx"] - mean["x"] ** 2
+    cov = mean["dx"] - mean["d"] * mean["x"]
+
+    if control and var_x > 0:
+        beta = cov / var_x
+        estimate = mean["d"] - beta * mean["x"]
+        var_y = var_d - beta * cov
+    else:
+        estimate = mean["d"]
+        var_y = var_d
+
+    # Variance of the plain difference of two independent runs, per round.
+    naive = (mean["ff"] - mean["f"] ** 2) + (mean["tt"] - mean["t"] ** 2)
+    per_round = var_y * rounds / samples
+
+    return {
+        "difference": estimate,
+        "house_edge_difference": -estimate / tweaked.stakes(),
+        "half_width": float(z * np.sqrt(max(var_y, 0.0) / samples)),
+        "rounds": rounds,
+        "variance_reduction": naive / per_round if per_round > 0 else float("inf")
+    }
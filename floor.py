@@ -0,0 +1,153 @@
+"""Lockstep simulation of a casino floor of many wheels.
+
+Every table has its own prize poll, weights, bets and house bank. The whole floor
+is held in arrays (a tables x bulbs matrix for the prizes paid and the CDFs, and a
+bank vector), and every round advances all the tables at once with array
+operations, so there is no Python loop over tables."""
+
+import numpy as np
+
+import simulation as sim
+
+class FloorResult:
+    """Per-round summary of a floor run, plus the final state of every table."""
+    def __init__(self, levels: tuple[float, ...], quantiles: np.ndarray, mean: np.ndarray, total: np.ndarray,
+                 closed: np.ndarray, final: np.ndarray, exhausted_at: np.ndarray, trajectories: np.ndarray|None = None):
+        self.levels = levels
+        self.quantiles = quantiles
+        self.mean = mean
+        self.total = total
+        self.closed = closed
+        self.final = final
+        self.exhausted_at = exhausted_at
+        self.trajectories = trajectories
+
+    def __len__(self):
+        return len(self.closed)
+
+    def exhausted(self) -> np.ndarray:
+        """Indices of the tables whose bank ran out, in table order."""
+        return np.nonzero(self.exhausted_at >= 0)[0]
+
+class Floor:
+    """Advances the banks of `tables` wheels in chunks of rounds, so memory stays bounded.
+
+    `prize_polls`, `weights` and `winners` (the number of bets on each bulb) are
+    tables x bulbs matrices; tables with fewer bulbs are padded with zero
+    weights. A table closes from the first round its bank can no longer cover the
+    largest prize it might owe, and its bank is frozen from then on."""
+    def __init__(self, prize_polls: np.ndarray, weights: np.ndarray, winners: np.ndarray, stakes: np.ndarray,
+                 banks: np.ndarray, random_seed: int = 42, max_cells: int = 1 << 22):
+        self.prize_polls = np.asarray(prize_polls, dtype = np.int64)
+        self.winners = np.asarray(winners, dtype = np.int64)
+        self.stakes = np.broadcast_to(np.asarray(stakes, dtype = np.int64), len(self.prize_polls)).copy()
+        self.banks = np.broadcast_to(np.asarray(banks, dtype = np.int64), len(self.prize_polls)).copy()
+        self.random_seed = random_seed
+        self.max_cells = max_cells
+
+        weights = np.asarray(weights, dtype = np.float64)
+        if weights.shape != self.prize_polls.shape or (weights < 0).any() or not (weights.sum(axis = 1) > 0).all():
+            raise ValueError("Every table needs non-negative weights for each bulb, with a positive total.")
+
+        self.cdf = np.cumsum(weights / weights.sum(axis = 1, keepdims = True), axis = 1)
+        # From the last bulb with a positive weight on, the CDF is exactly 1, so every draw lands.
+        last = weights.shape[1] - 1 - np.argmax(weights[:, ::-1] > 0, axis = 1)
+        self.cdf[np.arange(weights.shape[1]) >= last[:, None]] = 1.0
+
+        # Per-table guide table: the first bulb each of `4 x bulbs` equal cells of
+        # [0, 1) can land on, so a draw only steps over a bulb or two from there.
+        cells = 4 * weights.shape[1]
+        self.guide = (self.cdf[:, None, :] <= np.arange(cells)[None, :, None] / cells).sum(axis = 2)
+
+    @classmethod
+    def from_games(cls, games: list[sim.Game], random_seed: int = 42, max_cells: int = 1 << 22) -> "Floor":
+        """A floor with one table per game, using each game's prize poll, weights, bets and bank."""
+        lights = max(g.lights for g in games)
+        prize_polls = np.zeros((len(games), lights), dtype = np.int64)
+        weights = np.zeros((len(games), lights))
+        winners = np.zeros((len(games), lights), dtype = np.int64)
+
+        for t, game in enumerate(games):
+            prize_polls[t, :game.lights] = game.prize_poll
+            weights[t, :game.lights] = game.sampler.p
+            winners[t, :game.lights] = game.book.winners()
+
+        return cls(prize_polls, weights, winners, [g.stakes() for g in games], [g.initial_bank for g in games],
+                   random_seed, max_cells)
+
+    @property
+    def tables(self) -> int:
+        return len(self.banks)
+
+    def sample(self, rng: np.random.Generator, rounds: int) -> np.ndarray:
+        """Selected bulb of every table for `rounds` rounds, as a rounds x tables array."""
+        lights, cells = self.cdf.shape[1], self.guide.shape[1]
+        tables = np.arange(self.tables)
+        u = rng.random((rounds, self.tables))
+
+        # Positions in the flattened CDF matrix, starting from each draw's guide cell.
+        cdf = self.cdf.ravel()
+        pos = (self.guide.ravel()[tables * cells + (u * cells).astype(np.intp)] + tables * lights).ravel()
+        u = u.ravel()
+
+        # Step draws forward to the first bulb whose CDF is above them; only the
+        # draws still moving are looked at again.
+        todo = np.flatnonzero(cdf[pos] <= u)
+        while len(todo):
+            pos[todo] += 1
+            todo = todo[cdf[pos[todo]] <= u[todo]]
+
+        return pos.reshape(rounds, self.tables) - tables * lights
+
+    def run(self, rounds: int, levels: tuple[float, ...] = (0.05, 0.25, 0.5, 0.75, 0.95),
+            keep_trajectories: bool = False) -> FloorResult:
+        """Plays `rounds` rounds on every table.
+
+        Keeps per-round quantiles (at `levels`; pass `()` to skip them, they are
+        the costliest summary), mean and total bank and the fraction of closed
+        tables, plus the round each table closed on (-1 if it stayed open)."""
+        tables = self.tables
+        rng = np.random.default_rng(self.random_seed)
+        chunk = max(1, self.max_cells // tables)
+
+        # House side of every outcome, and the largest prize each table may owe in a round.
+        bank_net = self.stakes[:, None] - self.prize_polls * self.winners
+        cover = (self.prize_polls * self.winners).max(axis = 1)
+        table_index = np.arange(tables)
+
+        banks = self.banks.copy()
+        exhausted_at = np.where(banks < cover, 0, -1)
+        quantiles = np.empty((len(levels), rounds))
+        mean = np.empty(rounds)
+        total = np.empty(rounds)
+        closed = np.empty(rounds)
+        trajectories = np.empty((tables, rounds), dtype = np.int64) if keep_trajectories else None
+
+        for start in range(0, rounds, chunk):
+            size = min(chunk, rounds - start)
+
+            # Rounds run along the first axis, tables along the second.
+            selected = self.sample(rng, size)
+            walk = banks + np.cumsum(bank_net[table_index, selected], axis = 0)
+
+            # Bank before each round; a table is closed from the first round it cannot cover.
+            before = np.concatenate((banks[None, :], walk[:-1]), axis = 0)
+            out = np.logical_or.accumulate(before < cover, axis = 0)
+            first = out.argmax(axis = 0)
+            walk = np.where(out, before[first, table_index], walk)
+
+            newly = (exhausted_at < 0) & out[-1]
+            exhausted_at[newly] = start + first[newly]
+
+            if levels:
+                quantiles[:, start:start + size] = np.quantile(walk, levels, axis = 1)
+            mean[start:start + size] = walk.mean(axis = 1)
+            total[start:start + size] = walk.sum(axis = 1)
+            closed[start:start + size] = out.mean(axis = 1)
+
+            if keep_trajectories:
+                trajectories[:, start:start + size] = walk.T
+
+            banks = walk[-1]
+
+        return FloorResult(levels, quantiles, mean, total, closed, banks, exhausted_at, trajectories)
@@ -0,0 +1,176 @@
+"""Simulation runs in the background, with progress and cancellation.
+
+A `SimulationJob` plays several simulators at once, each in its own worker
+process, so a long run does not block the caller. Workers report the rounds they
+have played after every chunk and stop at the next chunk boundary once the job is
+cancelled. Results are the same as those of `Simulator.run()` with the same seed
+and chunk size.
+
+Everything slow about a finished run happens in the workers too: they write the
+result cache's disk entries, and other work (such as the paired comparison) can
+be submitted alongside, so collecting the results does not block the caller.
+Those tasks stop at their next chunk on cancellation too."""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import simulation as sim
+import cache
+
+def _run_job(args):
+    """Process pool task: runs one simulator, reporting progress on `updates` until `stop` is set.
+
+    With a `trace` directory the run is recorded there instead. Otherwise a
+    finished result is written to the cache directory `cache_dir` (if any) under
+    `key`."""
+    name, game, random_seed, n, chunk_size, profiling, updates, stop, cache_dir, key, trace = args
+    simulator = sim.Simulator(game, n, random_seed)
+    simulator.instrument(sim.Profiler(profiling))
+
+    def progress(rounds):
+        updates.put((name, rounds))
+        return not stop.is_set()
+
+    try:
+        if trace is None:
+            result = simulator.run(n, chunk_size, progress = progress)
+        else:
+            result = simulator.record(trace, n, chunk_size, progress = progress)
+    except sim.Cancelled:
+        return None, simulator.profiler
+
+    if trace is not None:
+        # Reading the statistics back takes a pass over the files, so it happens here too.
+        with simulator.profiler.phase("results", n):
+            result.stats()
+    elif cache_dir is not None:
+        with simulator.profiler.phase("cache"):
+            cache.write_entry(cache_dir, key, result)
+
+    return result, simulator.profiler
+
+def _run_task(args):
+    """Process pool task: runs `task` with a progress callback that stops it once `stop` is set."""
+    task, stop = args
+
+    try:
+        return task(progress = lambda rounds: not stop.is_set())
+    except sim.Cancelled:
+        return None
+
+class SimulationJob:
+    """Runs `simulators` (by name) concurrently in a process pool.
+
+    Runs already in `result_cache` are served from it straight away, and finished
+    runs are added to it. `tasks` maps names to picklable callables (such as
+    `functools.partial` objects) run in the same pool; each is called with a
+    `progress` callback like `Simulator.run()`'s and should raise `Cancelled` when
+    it returns False. Their return values are in `extras` once collected. Poll
+    `progress()` and `done()`, then `collect()` the results, which also books them
+    on the simulators' games.
+
+    `traces` maps simulator names to directories: those simulators are recorded
+    there with `Simulator.record()` instead, and their results are `Trace`s, which
+    are not cached."""
+    def __init__(self, simulators: dict[str, sim.Simulator], chunk_size: int = 1_000_000,
+                 result_cache: cache.ResultCache|None = None, tasks: dict|None = None,
+                 traces: dict[str, str]|None = None):
+        self.simulators = simulators
+        self.chunk_size = chunk_size
+        self.cache = result_cache
+        self.traces = traces or {}
+        self.rounds = dict.fromkeys(simulators, 0)
+        self.results = {}
+        self.extras = {}
+        self.cancelled = False
+        self._futures = {}
+        self._tasks = {}
+        self._pool = None
+        self._manager = None
+
+        pending = []
+        for name, simulator in simulators.items():
+            result = None if result_cache is None or name in self.traces else result_cache.get(self._key(simulator))
+
+            if result is None:
+                pending.append(name)
+            else:
+                simulator.apply(result)
+                self.results[name] = result
+                self.rounds[name] = len(result)
+
+        tasks = tasks or {}
+        if pending or tasks:
+            self._manager = multiprocessing.Manager()
+            self._updates = self._manager.Queue()
+            self._stop = self._manager.Event()
+            self._pool = ProcessPoolExecutor(len(pending) + len(tasks))
+            cache_dir = None if result_cache is None else result_cache.directory
+
+            for name in pending:
+                simulator = simulators[name]
+                self._futures[name] = self._pool.submit(_run_job, (
+                    name, simulator.game, simulator.random_seed, simulator.n_of_sims, chunk_size,
+                    simulator.profiler.enabled, self._updates, self._stop, cache_dir, self._key(simulator),
+                    self.traces.get(name)
+                ))
+
+            for name, task in tasks.items():
+                self._tasks[name] = self._pool.submit(_run_task, (task, self._stop))
+
+    def _key(self, simulator: sim.Simulator) -> str:
+        return cache.result_key(simulator.game, simulator.n_of_sims, simulator.random_seed, self.chunk_size)
+
+    def total(self) -> int:
+        return sum(s.n_of_sims for s in self.simulators.values())
+
+    def progress(self) -> float:
+        """Fraction of all the job's rounds played so far."""
+        if self._manager is not None and not self.finished:
+            while not self._updates.empty():
+                name, rounds = self._updates.get()
+                self.rounds[name] = max(self.rounds[name], rounds)
+
+        return sum(self.rounds.values()) / self.total()
+
+    @property
+    def finished(self) -> bool:
+        return self._pool is None
+
+    def done(self) -> bool:
+        return all(f.done() for f in list(self._futures.values()) + list(self._tasks.values()))
+
+    def cancel(self) -> None:
+        """Asks every worker and task to stop after its current chunk."""
+        if not self.finished:
+            self._stop.set()
+            self.cancelled = True
+
+    def collect(self) -> dict[str, sim.SimulationResult]|None:
+        """Waits for the workers and returns the results by name, or None if the job was cancelled."""
+        if not self.finished:
+            for name, future in self._futures.items():
+                result, profiler = future.result()
+                simulator = self.simulators[name]
+                simulator.profiler.merge(profiler)
+
+                if result is None:
+                    self.cancelled = True
+                    continue
+
+                simulator.apply(result)
+                self.results[name] = result
+                self.rounds[name] = len(result)
+
+                if self.cache is not None and name not in self.traces:
+                    self.cache.put(self._key(simulator), result, written = self.cache.directory is not None)
+
+            if not self.cancelled:
+                self.extras = {name: future.result() for name, future in self._tasks.items()}
+
+            # Cancelled tasks stop at their next chunk, but still need the manager until then.
+            self._pool.shutdown(cancel_futures = True)
+            self._manager.shutdown()
+            self._pool = None
+
+        return None if self.cancelled else self.results
@@ -8,14 +8,22 @@ import numpy as np
 import pandas as pd
 # For animation delay
 import time
+# For in-memory wheel frames
+import io
 # For the game models
 import simulation as sim
+# For the weight optimizer
+import analysis
 
 # Initialize important variables into session_state to persist on current session.
 st.session_state.NUM_BULBS = st.session_state.get("NUM_BULBS", 12)
 st.session_state.RADIUS = st.session_state.get("RADIUS", 1.0)
 st.session_state.WEIGHTS = st.session_state.get("WEIGHTS", [])
 st.session_state.SPIN_SPEED = st.session_state.get("SPIN_SPEED", 0.07)
+st.session_state.TARGET_EDGE = st.session_state.get("TARGET_EDGE", None)
+st.session_state.MIN_P = st.session_state.get("MIN_P", 0.0)
+st.session_state.MAX_P = st.session_state.get("MAX_P", 1.0)
+st.session_state.MAX_DEVIATION = st.session_state.get("MAX_DEVIATION", 1.0)
 
 st.session_state.PRIZE_POLL = st.session_state.get(
     "PRIZE_POLL",
@@ -54,31 +62,50 @@ def on_weight_change(light):
     if sum(st.session_state.WEIGHTS) != 1.0:
         st.session_state.WEIGHTS[light] += (1 - sum(st.session_state.WEIGHTS))
 
-def draw_wheel(active_index, highlight = False):
+def optimizer_game():
+    """The tweaked game with the current weights and bet, as the weight optimizer sees it."""
+    game = sim.TweakedGame(st.session_state.NUM_BULBS, st.session_state.WEIGHTS, prize_poll = st.session_state.PRIZE_POLL)
+    game.bet(1, st.session_state.bet_amount, st.session_state.bet)
+    return game
+
+def apply_optimized_weights():
+    """Replaces the weights with the solver's, for the target house edge on the current bet."""
+    game = optimizer_game()
+
+    try:
+        st.session_state.WEIGHTS = analysis.optimize_weights(
+            game, st.session_state.TARGET_EDGE / 100, st.session_state.MIN_P, st.session_state.MAX_P,
+            st.session_state.MAX_DEVIATION
+        )
+        st.session_state.OPTIMIZER_ERROR = None
+    except ValueError as e:
+        st.session_state.OPTIMIZER_ERROR = str(e)
+
+def draw_wheel(num_bulbs, radius, prize_poll, active_index, highlight = False):
     """Helper function to draw the wheel."""
     fig, ax = plt.subplots(figsize = (5.5, 5.5))
     fig.patch.set_facecolor("#111111")
     ax.set_facecolor("#111111")
 
     # Draw outer and inner rings
-    ax.add_artist(plt.Circle((0, 0), st.session_state.RADIUS, fill = False, # pyright: ignore[reportPrivateImportUsage]
+    ax.add_artist(plt.Circle((0, 0), radius, fill = False, # pyright: ignore[reportPrivateImportUsage]
                              linewidth = 4, color = "white"))
 
-    ax.add_artist(plt.Circle((0, 0), st.session_state.RADIUS * 0.7, fill = False, # pyright: ignore[reportPrivateImportUsage]
+    ax.add_artist(plt.Circle((0, 0), radius * 0.7, fill = False, # pyright: ignore[reportPrivateImportUsage]
                              linewidth = 2, color = "#777"))
 
     # Compute the angles for bulb placement
-    angles = np.linspace(0, 2 * np.pi, st.session_state.NUM_BULBS, endpoint = False) + np.pi / 2
+    angles = np.linspace(0, 2 * np.pi, num_bulbs, endpoint = False) + np.pi / 2
 
     for i, angle in enumerate(angles):
         # Bulb position
-        bx, by = st.session_state.RADIUS * np.cos(angle), st.session_state.RADIUS * np.sin(angle)
+        bx, by = radius * np.cos(angle), radius * np.sin(angle)
 
         # Prize label position
-        tx, ty = 0.55 * st.session_state.RADIUS * np.cos(angle), 0.55 * st.session_state.RADIUS * np.sin(angle)
+        tx, ty = 0.55 * radius * np.cos(angle), 0.55 * radius * np.sin(angle)
 
         # Bulb label position
-        btx, bty = 0.75 * st.session_state.RADIUS * np.cos(angle), 0.75 * st.session_state.RADIUS * np.sin(angle)
+        btx, bty = 0.75 * radius * np.cos(angle), 0.75 * radius * np.sin(angle)
 
         # Draw bulb (highlight active bulb)
         if i == active_index:
@@ -99,7 +126,7 @@ def draw_wheel(active_index, highlight = False):
 
         # Draw prize text
         ax.text(
-            tx, ty, f"${st.session_state.PRIZE_POLL[i]}",
+            tx, ty, f"${prize_poll[i]}",
             ha = "center", va = "center",
             rotation = rotation, rotation_mode = "anchor",
             color = color,
@@ -120,6 +147,28 @@ def draw_wheel(active_index, highlight = False):
     ax.set_aspect("equal")
     return fig
 
+@st.cache_data(max_entries = 512, show_spinner = False)
+def render_wheel(num_bulbs, radius, prize_poll, active_index, highlight = False):
+    """Helper function to render a wheel frame as PNG bytes.
+
+    Frames are cached per wheel layout and lit bulb, so a spin only draws each
+    frame with matplotlib the first time it is shown."""
+    fig = draw_wheel(num_bulbs, radius, prize_poll, active_index, highlight)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format = "png", facecolor = fig.get_facecolor())
+    plt.close(fig)
+
+    return buffer.getvalue()
+
+def show_wheel(active_index, highlight = False):
+    """Helper function to display the current wheel frame."""
+    wheel.image(
+        render_wheel(
+            st.session_state.NUM_BULBS, st.session_state.RADIUS,
+            tuple(int(p) for p in st.session_state.PRIZE_POLL), active_index, highlight
+        )
+    )
+
 # Toggle switch for tweaked game
 st.toggle("Tweaked Game", key = "is_tweaked_game")
 
@@ -153,7 +202,7 @@ with st.expander(":material/edit: Game settings"):
     
     st.html("<b>Tweaked Game settings</b>")
 
-    st.info("Due to floating point precision, the total number of probability weights declared may not always equate to 1.0, as per required by `np.random.choice`'s `p` parameter. You can fine adjust the weights to fix this.", icon = ":material/info:")
+    st.info("Due to floating point precision, the total number of probability weights declared may not always equate to exactly 1.0. The game normalizes the weights before sampling, so small drift is harmless.", icon = ":material/info:")
 
     g = pd.DataFrame([st.session_state.WEIGHTS])
     st.bar_chart(g, horizontal = True, x_label = "", sort = True)
@@ -169,6 +218,35 @@ with st.expander(":material/edit: Game settings"):
                                                           on_change = on_weight_change, args = [l],
                                                           format = "%.17f")
 
+    st.html("<b>Weights for a target house edge</b>")
+
+    # Prizes do not scale with the stake, so most targets are out of reach; start
+    # from the edge the current weights give and show the range the bounds allow.
+    game = optimizer_game()
+    house_edge = analysis.house_edge(game)
+
+    if st.session_state.TARGET_EDGE is None:
+        st.session_state.TARGET_EDGE = min(max(round(house_edge * 100, 2), -100.0), 100.0)
+
+    with st.container(horizontal = True):
+        st.number_input("Target house edge (%)", -100.0, 100.0, key = "TARGET_EDGE", icon = ":material/percent:")
+        st.number_input("Min. bulb probability", 0.0, 1.0, key = "MIN_P", format = "%.4f")
+        st.number_input("Max. bulb probability", 0.0, 1.0, key = "MAX_P", format = "%.4f")
+        st.number_input("Max. deviation from uniform", 0.0, 1.0, key = "MAX_DEVIATION", format = "%.4f")
+
+    try:
+        low, high = analysis.edge_range(game, st.session_state.MIN_P, st.session_state.MAX_P,
+                                        st.session_state.MAX_DEVIATION)
+        st.caption(f"Current house edge: {house_edge:.2%}. These bounds allow {low:.2%} to {high:.2%}.")
+    except ValueError as e:
+        st.caption(str(e))
+
+    st.button("Apply optimized weights", icon = ":material/tune:", on_click = apply_optimized_weights,
+              disabled = not st.session_state.is_tweaked_game)
+
+    if st.session_state.get("OPTIMIZER_ERROR"):
+        st.error(st.session_state.OPTIMIZER_ERROR, icon = ":material/error:")
+
 # Empty container for wheel rendering
 wheel = st.empty()
 
@@ -214,7 +292,7 @@ with st.container(border = True, horizontal = True):
                 # Spin animation loop
                 for i in range((st.session_state.NUM_BULBS * 3) + (game.selected + 1)):
                     st.session_state.current = i % st.session_state.NUM_BULBS
-                    wheel.pyplot(draw_wheel(st.session_state.current))
+                    show_wheel(st.session_state.current)
                     time.sleep(st.session_state.SPIN_SPEED + 1 * 0.003)
                 
                 # Get outcome from game object.
@@ -238,9 +316,7 @@ with st.container(border = True, horizontal = True):
                     st.error(f"Sorry! You didn't won.", icon = ":material/sentiment_dissatisfied:")
 
 # Render final wheel state
-wheel.pyplot(
-    draw_wheel(
-        st.session_state.current,
-        highlight = st.session_state.result_prize is not None
-    )
+show_wheel(
+    st.session_state.current,
+    highlight = st.session_state.result_prize is not None
 )
@@ -0,0 +1,43 @@
+"""Downsampling of per-round results for charts.
+
+A cumulative profit curve over millions of rounds cannot be drawn point by point,
+so it is reduced to the minimum and maximum of each of a few thousand buckets of
+rounds. That keeps the visual envelope of the random walk with a fixed number of
+points, and is computed chunk by chunk so it works on memory-mapped traces too."""
+
+import numpy as np
+
+import simulation as sim
+
+def profit_envelope(result: sim.SimulationResult|sim.Trace, buckets: int = 2000) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Min/max envelope of the players' cumulative profit over at most `buckets` buckets of rounds.
+
+    Returns the first round of each bucket and the lowest and highest cumulative
+    profit reached within it."""
+    n = len(result)
+    width = -(-n // buckets)
+    count = -(-n // width)
+    lows = np.full(count, np.iinfo(np.int64).max)
+    highs = np.full(count, np.iinfo(np.int64).min)
+
+    start = 0
+    carry = 0
+    for _, payout in result.chunks():
+        cumulative = carry + np.cumsum(payout.astype(np.int64) - result.stakes)
+        carry = int(cumulative[-1])
+
+        # Offsets within the chunk where a new bucket begins
+        first = -(-start // width)
+        edges = np.arange(first * width, start + len(payout), width) - start
+        cuts = np.concatenate(([0], edges[edges > 0]))
+        ids = (start + cuts) // width
+
+        lows[ids] = np.minimum(lows[ids], np.minimum.reduceat(cumulative, cuts))
+        highs[ids] = np.maximum(highs[ids], np.maximum.reduceat(cumulative, cuts))
+        start += len(payout)
+
+    return np.arange(count) * width, lows, highs
+
+def envelope_line(rounds: np.ndarray, lows: np.ndarray, highs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Interleaves an envelope into one line that zig-zags between the low and high of each bucket."""
+    return np.repeat(rounds, 2), np.column_stack((lows, highs)).ravel()
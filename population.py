@@ -0,0 +1,74 @@
+"""Bankroll simulation for a population of independent players.
+
+Every player starts from the same balance and repeats the game's bets on their own
+wheel each round, until their balance can no longer cover the total stake."""
+
+import numpy as np
+
+import simulation as sim
+import analysis
+
+class PopulationResult:
+    """Per-round summary of a population run."""
+    def __init__(self, levels: tuple[float, ...], quantiles: np.ndarray, mean: np.ndarray, ruined: np.ndarray,
+                 final: np.ndarray, trajectories: np.ndarray|None = None):
+        self.levels = levels
+        self.quantiles = quantiles
+        self.mean = mean
+        self.ruined = ruined
+        self.final = final
+        self.trajectories = trajectories
+
+    def __len__(self):
+        return len(self.ruined)
+
+class Population:
+    """Advances a (players x rounds) balance state in chunks of rounds so memory stays bounded.
+
+    Ruined players are masked: their balance is frozen from the round they could
+    no longer bet. Only per-round quantiles, mean balance and the fraction ruined
+    are kept, unless full trajectories are asked for."""
+    def __init__(self, game_model: sim.Game, players: int = 100000, balance: int = 2000, random_seed: int = 42,
+                 max_cells: int = 1 << 22):
+        self.game = game_model
+        self.players = players
+        self.balance = balance
+        self.random_seed = random_seed
+        self.max_cells = max_cells
+
+    def run(self, rounds: int, levels: tuple[float, ...] = (0.05, 0.25, 0.5, 0.75, 0.95),
+            keep_trajectories: bool = False) -> PopulationResult:
+        _, net = analysis.round_outcomes(self.game)
+        stakes = self.game.stakes()
+        rng = np.random.default_rng(self.random_seed)
+        chunk = max(1, self.max_cells // self.players)
+
+        balances = np.full(self.players, self.balance, dtype = np.int64)
+        quantiles = np.empty((len(levels), rounds))
+        mean = np.empty(rounds)
+        ruined = np.empty(rounds)
+        trajectories = np.empty((self.players, rounds), dtype = np.int64) if keep_trajectories else None
+
+        for start in range(0, rounds, chunk):
+            size = min(chunk, rounds - start)
+
+            # Rounds run along the first axis so per-round reductions read contiguous rows.
+            selected = self.game.sampler.sample(rng, (size, self.players))
+            walk = balances + np.cumsum(net[selected], axis = 0)
+
+            # Balance before each round; a player is out from the first round they cannot cover.
+            before = np.concatenate((balances[None, :], walk[:-1]), axis = 0)
+            out = np.logical_or.accumulate(before < stakes, axis = 0)
+            frozen = before[out.argmax(axis = 0), np.arange(self.players)]
+            walk = np.where(out, frozen, walk)
+
+            quantiles[:, start:start + size] = np.quantile(walk, levels, axis = 1)
+            mean[start:start + size] = walk.mean(axis = 1)
+            ruined[start:start + size] = (walk < stakes).mean(axis = 1)
+
+            if keep_trajectories:
+                trajectories[:, start:start + size] = walk.T
+
+            balances = walk[-1]
+
+        return PopulationResult(levels, quantiles, mean, ruined, balances, trajectories)
@@ -1,7 +1,19 @@
 import streamlit as st
 import simulation as sim
+import analysis
+import comparison
+import cache
+import jobs
+import sweep
+import plotting
 import pandas as pd
 import matplotlib.pyplot as plt
+import numpy as np
+import functools
+import os
+import shutil
+import tempfile
+import time
 
 # Initialize constants and variables in persistent session token.
 st.session_state.NUM_BULBS = st.session_state.get('NUM_BULBS', 12)
@@ -9,6 +21,71 @@ st.session_state.SESSION_RUNS = st.session_state.get('SESSION_RUNS', 10000)
 st.session_state.SEED = st.session_state.get('SEED', 42)
 st.session_state.WEIGHTS = st.session_state.get('WEIGHTS', [])
 st.session_state.BET = st.session_state.get('BET', 0)
+st.session_state.WORKERS = st.session_state.get('WORKERS', 1)
+st.session_state.OUT_OF_CORE = st.session_state.get('OUT_OF_CORE', False)
+st.session_state.SHOW_EV_BAND = st.session_state.get('SHOW_EV_BAND', True)
+st.session_state.PROFILE = st.session_state.get('PROFILE', False)
+st.session_state.PROFILE_CPROFILE = st.session_state.get('PROFILE_CPROFILE', False)
+st.session_state.PROFILE_MEMORY = st.session_state.get('PROFILE_MEMORY', False)
+st.session_state.TARGET_EDGE = st.session_state.get('TARGET_EDGE', None)
+st.session_state.MIN_P = st.session_state.get('MIN_P', 0.0)
+st.session_state.MAX_P = st.session_state.get('MAX_P', 1.0)
+st.session_state.MAX_DEVIATION = st.session_state.get('MAX_DEVIATION', 1.0)
+
+# Most buckets of rounds drawn per series on the cumulative profit chart.
+PLOT_BUCKETS = 2000
+
+# Rounds of uniform draws kept by the tweaked simulator for fast re-runs after a
+# weight change (the fair game's weights never change, so it keeps none).
+UNIFORM_CACHE = 10_000_000
+
+# Runs of at least this many rounds go to background worker processes, with progress and cancellation.
+BACKGROUND_RUNS = 1_000_000
+
+# Memory-mapped traces of out-of-core runs, in a directory per run.
+TRACE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".sim_traces")
+
+# Trace directories untouched for this long (seconds) belong to sessions that ended.
+TRACE_MAX_AGE = 24 * 3600
+
+@st.cache_resource
+def get_result_cache():
+    """Result cache shared by every session, persisted next to the app."""
+    return cache.ResultCache(directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".sim_cache"))
+
+def prune_traces():
+    """Removes the trace directories of this session's previous run and of sessions that ended."""
+    if st.session_state.get("TRACE_PATH"):
+        shutil.rmtree(st.session_state.TRACE_PATH, ignore_errors = True)
+        st.session_state.TRACE_PATH = None
+
+    if os.path.isdir(TRACE_DIR):
+        for entry in os.scandir(TRACE_DIR):
+            if time.time() - entry.stat().st_mtime > TRACE_MAX_AGE:
+                shutil.rmtree(entry.path, ignore_errors = True)
+
+def session_prize_poll():
+    """Prize poll derived from the seed, shared by both simulated games."""
+    return [int(p) for p in np.random.default_rng(st.session_state.SEED).choice(sim.Game.c, st.session_state.NUM_BULBS)]
+
+def optimizer_game():
+    """The tweaked game with the current weights and bet, as the weight optimizer sees it."""
+    game = sim.TweakedGame(st.session_state.NUM_BULBS, st.session_state.WEIGHTS, prize_poll = session_prize_poll())
+    game.bet(1, 250, st.session_state.BET)
+    return game
+
+def apply_optimized_weights():
+    """Replaces the tweaked game's weights with the solver's, for the target house edge."""
+    game = optimizer_game()
+
+    try:
+        st.session_state.WEIGHTS = analysis.optimize_weights(
+            game, st.session_state.TARGET_EDGE / 100, st.session_state.MIN_P, st.session_state.MAX_P,
+            st.session_state.MAX_DEVIATION
+        )
+        st.session_state.OPTIMIZER_ERROR = None
+    except ValueError as e:
+        st.session_state.OPTIMIZER_ERROR = str(e)
 
 def on_weight_change(light):
     # Redistribute weights change across N bulbs
@@ -38,11 +115,21 @@ with st.expander(":material/edit: Modify simulation parameters"):
             st.session_state.WEIGHTS = [1 / st.session_state.NUM_BULBS for i in range(st.session_state.NUM_BULBS)]
         st.number_input("Number of Simulations", 10000, step = 1000, key = "SESSION_RUNS", icon = ":material/timer_play:")
         st.number_input("Random Seed", value = 42, key = "SEED", icon = ":material/potted_plant:")
+        st.number_input("Worker processes", 1, os.cpu_count() or 1, key = "WORKERS", icon = ":material/memory:")
+        st.toggle("Stream runs to disk (memory-mapped, for very long runs)", key = "OUT_OF_CORE")
+        st.toggle("Show expected profit and 95% band", key = "SHOW_EV_BAND")
         st.number_input("Bet on:", key = st.session_state.BET, min_value = 0,
                         max_value = st.session_state.NUM_BULBS, icon = ":material/casino:")
+
+    st.markdown("<b>Performance instrumentation</b>", unsafe_allow_html = True)
+
+    with st.container(horizontal = True):
+        st.toggle("Phase timers", key = "PROFILE")
+        st.toggle("cProfile", key = "PROFILE_CPROFILE", disabled = not st.session_state.PROFILE)
+        st.toggle("Allocations (tracemalloc)", key = "PROFILE_MEMORY", disabled = not st.session_state.PROFILE)
     
     st.markdown("<b>Tweaked game settings</b>", unsafe_allow_html = True)
-    st.info("Due to floating point precision, the total number of probability weights declared may not always equate to 1.0, as per required by `np.random.choice`'s `p` parameter. You can fine adjust the weights to fix this.", icon = ":material/info:")
+    st.info("Due to floating point precision, the total number of probability weights declared may not always equate to exactly 1.0. The game normalizes the weights before sampling, so small drift is harmless.", icon = ":material/info:")
 
     g = pd.DataFrame([st.session_state.WEIGHTS])
     st.bar_chart(g, horizontal = True, x_label = "", sort = True)
@@ -55,164 +142,377 @@ with st.expander(":material/edit: Modify simulation parameters"):
                         value = st.session_state.WEIGHTS[l], on_change = on_weight_change,
                         args = [l], format = "%.17f")
 
+    st.markdown("<b>Weights for a target house edge</b>", unsafe_allow_html = True)
+
+    # Prizes do not scale with the stake, so most targets are out of reach; start
+    # from the edge the current weights give and show the range the bounds allow.
+    game = optimizer_game()
+    house_edge = analysis.house_edge(game)
+
+    if st.session_state.TARGET_EDGE is None:
+        st.session_state.TARGET_EDGE = min(max(round(house_edge * 100, 2), -100.0), 100.0)
+
+    with st.container(horizontal = True):
+        st.number_input("Target house edge (%)", -100.0, 100.0, key = "TARGET_EDGE", icon = ":material/percent:")
+        st.number_input("Min. bulb probability", 0.0, 1.0, key = "MIN_P", format = "%.4f")
+        st.number_input("Max. bulb probability", 0.0, 1.0, key = "MAX_P", format = "%.4f")
+        st.number_input("Max. deviation from uniform", 0.0, 1.0, key = "MAX_DEVIATION", format = "%.4f")
+
+    try:
+        low, high = analysis.edge_range(game, st.session_state.MIN_P, st.session_state.MAX_P,
+                                        st.session_state.MAX_DEVIATION)
+        st.caption(f"Current house edge: {house_edge:.2%}. These bounds allow {low:.2%} to {high:.2%}.")
+    except ValueError as e:
+        st.caption(str(e))
+
+    st.button("Apply optimized weights", icon = ":material/tune:", on_click = apply_optimized_weights)
+
+    if st.session_state.get("OPTIMIZER_ERROR"):
+        st.error(st.session_state.OPTIMIZER_ERROR, icon = ":material/error:")
+
+def paired_comparison(fair_sim, tweaked_sim):
+    """Paired comparison with common random numbers, as a task that can run in a worker process."""
+    return functools.partial(comparison.compare, fair_sim.game, tweaked_sim.game, fair_sim.n_of_sims,
+                             fair_sim.random_seed, antithetic = True, control = True)
+
+def summarize(fair, tweaked, fair_sim, tweaked_sim, paired = None):
+    """Aggregates of a finished fair/tweaked pair, kept in the session until the next run.
+
+    `paired` is the paired comparison if it was already computed (e.g. by a background job)."""
+    FG, TG = fair_sim.game, tweaked_sim.game
+    runs = fair_sim.n_of_sims
+    profiler = fair_sim.profiler
+
+    with profiler.phase("aggregate", 2 * runs):
+        summary = {
+            "fair": fair, "tweaked": tweaked, "FG": FG, "TG": TG, "runs": runs, "profiler": profiler,
+            "first_render": True,
+            "profit_fair": fair.total_profit(), "profit_tweaked": tweaked.total_profit(),
+            "profits_fair": {'-250': fair.losses(), '250': fair.wins()},
+            "profits_tweaked": {'-250': tweaked.losses(), '250': tweaked.wins()},
+            "win_rate_fair": fair.win_rate(), "win_rate_tweaked": tweaked.win_rate(),
+            "house_edge_fair": fair.house_edge() * 100, "house_edge_tweaked": tweaked.house_edge() * 100,
+
+            # Exact reference values from the analytic model
+            "exact_fair": [
+                analysis.win_rate(FG) * 100, analysis.expected_value(FG) * runs,
+                analysis.expected_value(FG), analysis.house_edge(FG) * 100
+            ],
+            "exact_tweaked": [
+                analysis.win_rate(TG) * 100, analysis.expected_value(TG) * runs,
+                analysis.expected_value(TG), analysis.house_edge(TG) * 100
+            ]
+        }
+
+    summary["paired"] = paired_comparison(fair_sim, tweaked_sim)() if paired is None else paired
+    return summary
+
 if st.button("Simulate", icon = ":material/play_circle:", type = "primary"):
+    # A new run replaces any run still going in the background.
+    if st.session_state.get("JOB") is not None:
+        st.session_state.JOB.cancel()
+        st.session_state.JOB.collect()
+        st.session_state.JOB = None
+
+    st.session_state.RESULTS = None
+    st.session_state.CANCELLED = False
+    prune_traces()
+
     with st.spinner("Running simulation...", show_time = True):
-        FG = sim.FairGame(st.session_state.NUM_BULBS)
-        TG = sim.TweakedGame(st.session_state.NUM_BULBS, st.session_state.WEIGHTS)
+        # Keep the simulators while only the weights change, so a re-run just
+        # re-maps their cached uniform draws through the new weights.
+        run_key = (st.session_state.NUM_BULBS, st.session_state.SEED, st.session_state.SESSION_RUNS, st.session_state.BET)
 
-        # Bet
-        FG.bet(1, 250, st.session_state.BET)
-        TG.bet(1, 250, st.session_state.BET)
+        if st.session_state.get("RUN_KEY") != run_key:
+            # Both games share a prize poll derived from the seed, so identical
+            # settings give identical runs (and cache keys) across restarts.
+            prize_poll = session_prize_poll()
+            FG = sim.FairGame(st.session_state.NUM_BULBS, prize_poll = prize_poll)
+            TG = sim.TweakedGame(st.session_state.NUM_BULBS, st.session_state.WEIGHTS, prize_poll = prize_poll)
 
-        fair_sim = sim.Simulator(FG, st.session_state.SESSION_RUNS, st.session_state.SEED)
-        tweaked_sim = sim.Simulator(TG, st.session_state.SESSION_RUNS, st.session_state.SEED)
+            # Bet
+            FG.bet(1, 250, st.session_state.BET)
+            TG.bet(1, 250, st.session_state.BET)
 
-    a = [x for x in fair_sim.simulate()]
-    b = [y for y in tweaked_sim.simulate()]
+            st.session_state.FAIR_SIM = sim.Simulator(FG, st.session_state.SESSION_RUNS, st.session_state.SEED)
+            st.session_state.TWEAKED_SIM = sim.Simulator(TG, st.session_state.SESSION_RUNS, st.session_state.SEED,
+                                                         uniform_cache = UNIFORM_CACHE)
+            st.session_state.RUN_KEY = run_key
 
-    with st.spinner("Fetching results..."):
-        player_profit_fair = 0
-        player_profit_tweaked = 0
+        fair_sim = st.session_state.FAIR_SIM
+        tweaked_sim = st.session_state.TWEAKED_SIM
 
-        cumm_player_profit_fair = []
-        cumm_player_profit_tweaked = []
-        
-        for z in a:
-            if z != {}:
-                player_profit_fair += z[1]
-            else:
-                player_profit_fair -= 250
-            
-            cumm_player_profit_fair.append(player_profit_fair)
-        
-        for z in b:
-            if z != {}:
-                player_profit_tweaked += z[1]
-            else:
-                player_profit_tweaked -= 250
-            
-            cumm_player_profit_tweaked.append(player_profit_tweaked)
-        
-        player_profits_fair = {'-250': 0, '250': 0}
-        player_profits_tweaked = {'-250': 0, '250': 0}
-
-        for z in a:
-            if z == {}: player_profits_fair['-250'] += 1
-            else: player_profits_fair['250'] += 1
-        
-        for z in b:
-            if z == {}: player_profits_tweaked['-250'] += 1
-            else: player_profits_tweaked['250'] += 1
-
-        fair_win_rate = (len(a) - a.count({})) / len(a)
-        tweaked_win_rate = (len(b) - b.count({})) / len(b)
-
-        house_edge_fair = (fair_sim.game.initial_bank / st.session_state.SESSION_RUNS) / 250 * 100
-        house_edge_tweaked = (tweaked_sim.game.initial_bank / st.session_state.SESSION_RUNS) / 250 * 100
-
-        st.header(":material/analytics: Results")
-
-        # =====> Game results <=======
-        with st.container(horizontal = True):
-            # Fair Game Results
-            with st.container(border = True):
-                st.markdown("<h2>Fair Game Results</h2>", unsafe_allow_html = True)
-                st.table(
-                    {
-                        "Metrics": ["Win Rate:", "Total Profit:", "Avg. Profit per Round:", "House Edge:"],
-                        "Results": [
-                            f"{fair_win_rate * 100:.2f}%", f"${player_profit_fair:.2f}", f"${player_profit_fair / st.session_state.SESSION_RUNS:.2f}", f"{house_edge_fair:.2f}%"
-                        ]
-                    },
-                    border = False
-                )
-            
-            # Tweaked Game Results
-            with st.container(border = True):
-                st.html("<h2>Tweaked Game Results</h2>")
-                st.table(
-                    {
-                        "Metrics": ["Win Rate:", "Total Profit:", "Avg. Profit per Round:", "House Edge:"],
-                        "Results": [
-                            f"{tweaked_win_rate * 100:.2f}%", f"${player_profit_tweaked:.2f}", f"${player_profit_tweaked / st.session_state.SESSION_RUNS:.2f}", f"{house_edge_tweaked:.2f}%"
-                        ]
-                    },
-                    border = False
-                )
+        fair_sim.reset()
+        tweaked_sim.reset(st.session_state.WEIGHTS)
+
+        # Phase timers for the Performance panel (a no-op unless enabled)
+        profiler = sim.Profiler(st.session_state.PROFILE, st.session_state.PROFILE_CPROFILE,
+                                st.session_state.PROFILE_MEMORY)
+        fair_sim.instrument(profiler)
+        tweaked_sim.instrument(profiler)
+        profiler.start()
+
+        traces = None
+        if st.session_state.OUT_OF_CORE:
+            # A fresh directory per run, so sessions never write over each other's traces.
+            os.makedirs(TRACE_DIR, exist_ok = True)
+            st.session_state.TRACE_PATH = tempfile.mkdtemp(dir = TRACE_DIR)
+            traces = {name: os.path.join(st.session_state.TRACE_PATH, name) for name in ("fair", "tweaked")}
+
+        if st.session_state.SESSION_RUNS >= BACKGROUND_RUNS:
+            st.session_state.JOB = jobs.SimulationJob({"fair": fair_sim, "tweaked": tweaked_sim},
+                                                      result_cache = get_result_cache(),
+                                                      tasks = {"paired": paired_comparison(fair_sim, tweaked_sim)},
+                                                      traces = traces)
+
+        elif traces is not None:
+            fair = fair_sim.record(traces["fair"])
+            tweaked = tweaked_sim.record(traces["tweaked"])
+
+        else:
+            fair = get_result_cache().run(fair_sim, workers = st.session_state.WORKERS)
+            tweaked = get_result_cache().run(tweaked_sim, workers = st.session_state.WORKERS)
+
+    if st.session_state.get("JOB") is None:
+        with st.spinner("Fetching results..."):
+            st.session_state.RESULTS = summarize(fair, tweaked, fair_sim, tweaked_sim)
+
+# Polled only while a job is running; finishing it reruns the whole page.
+@st.fragment(run_every = 0.5 if st.session_state.get("JOB") is not None else None)
+def job_progress():
+    """Progress of the background run, polled without re-running the whole page."""
+    job = st.session_state.get("JOB")
+    if job is None:
+        return
 
-        # ============ EDA ANALYSIS =============
-        # Cummulative Player Profits
+    st.progress(job.progress(), text = f"Simulating {job.total():,} rounds in the background...")
+
+    if st.button("Cancel", icon = ":material/stop_circle:"):
+        job.cancel()
+
+    if job.done():
+        results = job.collect()
+        st.session_state.JOB = None
+
+        if results is None:
+            job.simulators["fair"].profiler.stop()
+            st.session_state.CANCELLED = True
+        else:
+            st.session_state.CANCELLED = False
+            st.session_state.RESULTS = summarize(results["fair"], results["tweaked"], job.simulators["fair"],
+                                                 job.simulators["tweaked"], job.extras["paired"])
+
+        st.rerun()
+
+job_progress()
+
+if st.session_state.get("JOB") is None and st.session_state.get("CANCELLED"):
+    st.info("Simulation cancelled.", icon = ":material/stop_circle:")
+
+if st.session_state.get("RESULTS") is not None:
+    results = st.session_state.RESULTS
+    fair, tweaked = results["fair"], results["tweaked"]
+    FG, TG = results["FG"], results["TG"]
+    runs = results["runs"]
+    profiler = results["profiler"]
+    paired = results["paired"]
+
+    # Only the first render after a run is timed and ends its profile; reruns of the page just redraw.
+    render_profiler = profiler if results.pop("first_render", False) else sim.Profiler(enabled = False)
+    exact_fair, exact_tweaked = results["exact_fair"], results["exact_tweaked"]
+    player_profit_fair, player_profit_tweaked = results["profit_fair"], results["profit_tweaked"]
+    player_profits_fair, player_profits_tweaked = results["profits_fair"], results["profits_tweaked"]
+    fair_win_rate, tweaked_win_rate = results["win_rate_fair"], results["win_rate_tweaked"]
+    house_edge_fair, house_edge_tweaked = results["house_edge_fair"], results["house_edge_tweaked"]
+
+    st.header(":material/analytics: Results")
+
+    # Mark the trace as in use, so other sessions do not prune it.
+    if st.session_state.get("TRACE_PATH") and os.path.isdir(st.session_state.TRACE_PATH):
+        os.utime(st.session_state.TRACE_PATH)
+
+    cache_stats = get_result_cache().stats()
+    st.caption(
+        f"Result cache: {cache_stats['memory_hits']} memory hits, {cache_stats['disk_hits']} disk hits, "
+        f"{cache_stats['misses']} misses"
+    )
+
+    # =====> Game results <=======
+    with st.container(horizontal = True):
+        # Fair Game Results
         with st.container(border = True):
-            st.html("<b>Cummulative Player Profits Over Time</b>")
-            
-            cumm_player_profits = pd.DataFrame(
-                [
-                    { "Fair Game": fg, "Tweaked Game": tg } for fg, tg in zip(cumm_player_profit_fair, cumm_player_profit_tweaked)
-                ]
+            st.markdown("<h2>Fair Game Results</h2>", unsafe_allow_html = True)
+            st.table(
+                {
+                    "Metrics": ["Win Rate:", "Total Profit:", "Avg. Profit per Round:", "House Edge:"],
+                    "Results": [
+                        f"{fair_win_rate * 100:.2f}%", f"${player_profit_fair:.2f}", f"${player_profit_fair / runs:.2f}", f"{house_edge_fair:.2f}%"
+                    ],
+                    "Exact": [
+                        f"{exact_fair[0]:.2f}%", f"${exact_fair[1]:.2f}", f"${exact_fair[2]:.2f}", f"{exact_fair[3]:.2f}%"
+                    ]
+                },
+                border = False
             )
 
-            # Delete these since it's no longer necessary to keep these in memory.
-            del cumm_player_profit_fair
-            del cumm_player_profit_tweaked
+        # Tweaked Game Results
+        with st.container(border = True):
+            st.html("<h2>Tweaked Game Results</h2>")
+            st.table(
+                {
+                    "Metrics": ["Win Rate:", "Total Profit:", "Avg. Profit per Round:", "House Edge:"],
+                    "Results": [
+                        f"{tweaked_win_rate * 100:.2f}%", f"${player_profit_tweaked:.2f}", f"${player_profit_tweaked / runs:.2f}", f"{house_edge_tweaked:.2f}%"
+                    ],
+                    "Exact": [
+                        f"{exact_tweaked[0]:.2f}%", f"${exact_tweaked[1]:.2f}", f"${exact_tweaked[2]:.2f}", f"{exact_tweaked[3]:.2f}%"
+                    ]
+                },
+                border = False
+            )
+
+    with st.container(border = True):
+        st.html("<b>Fair vs Tweaked (paired comparison)</b>")
+        st.table(
+            {
+                "Metrics": ["Profit difference per Round:", "House Edge difference:", "Variance reduction:"],
+                "Results": [
+                    f"${paired['difference']:.2f} ± {paired['half_width']:.2f}",
+                    f"{paired['house_edge_difference'] * 100:.2f}%",
+                    f"{paired['variance_reduction']:.1f}x"
+                ]
+            },
+            border = False
+        )
+
+    # ============ EDA ANALYSIS =============
+    # Cummulative Player Profits
+    with st.container(border = True):
+        st.html("<b>Cummulative Player Profits Over Time</b>")
+
+        with render_profiler.phase("plot", 2 * runs):
+            # Min/max envelope per bucket of rounds instead of every single round
+            envelopes = {
+                "Fair Game": plotting.profit_envelope(fair, PLOT_BUCKETS),
+                "Tweaked Game": plotting.profit_envelope(tweaked, PLOT_BUCKETS)
+            }
 
             fig, ax = plt.subplots()
 
             if st.context.theme.type == "dark":
                 plt.style.use("dark_background")
-            
+
             else:
                 plt.style.use("default")
 
             fig.set_size_inches(10, 8)
-            ax.plot(cumm_player_profits['Fair Game'], label = "Fair Game", color = "green")
-            ax.plot(cumm_player_profits['Tweaked Game'], label = "Tweaked Game", color = "orange")
+
+            for (label, (rounds, lows, highs)), color in zip(envelopes.items(), ("green", "orange")):
+                ax.plot(*plotting.envelope_line(rounds, lows, highs), label = label, color = color, linewidth = 1)
+
+            # Expected profit with a 95% band from the analytic model
+            if st.session_state.SHOW_EV_BAND:
+                for (rounds, _, _), game, color in zip(envelopes.values(), (FG, TG), ("green", "orange")):
+                    mean, lower, upper = analysis.profit_band(game, rounds + 1)
+                    ax.plot(rounds, mean, color = color, linestyle = "--", linewidth = 1)
+                    ax.fill_between(rounds, lower, upper, color = color, alpha = 0.15)
+
             ax.legend()
             ax.set_xlabel("Rounds")
             ax.set_ylabel("Profits ($)")
             ax.ticklabel_format(axis = "y", style = "plain", useOffset = False)
 
             st.pyplot(fig)
+            plt.close(fig)
 
-            del cumm_player_profits
+    render_profiler.stop()
 
-        # Profit Distribution Comparison
-        with st.container(border = True):
-            st.html("<b>Profit Distribution Comparison</b>")
-
-            with st.container(horizontal = True):
-                with st.container():
-                    st.write("Fair Game Profit Distribution")
-                    st.bar_chart(pd.DataFrame([player_profits_fair]), stack = False, y_label = "Frequency")
-                
-                with st.container():
-                    st.write("Tweaked Game Profit Distribution")
-                    st.bar_chart(pd.DataFrame([player_profits_tweaked]), stack = False, y_label = "Frequency")
-        
-        # House Edge & Win Rate
-        with st.container(border = True):
-            st.html("<b>House Edge and Win Rate</b>")
-            with st.container(horizontal = True):
-                with st.container():
-                    st.write("House Edge")
-                    st.bar_chart(
-                        pd.DataFrame(
-                            {
-                                "Fair Game": [house_edge_fair,],
-                                "Tweaked Game": [house_edge_tweaked,]
-                            }
-                        ),
-                        stack = False, y_label = "Perrcent (%)"
-                    )
-
-                with st.container():
-                    st.write("Win Rate")
-                    st.bar_chart(
-                        pd.DataFrame(
-                            {
-                                "Fair Game": [fair_win_rate * 100,],
-                                "Tweaked Game": [tweaked_win_rate * 100,]
-                            }
-                        ),
-                        stack = False, y_label = "Perrcent (%)"
-                    )
+    # Performance panel
+    if profiler.enabled:
+        with st.expander(":material/speed: Performance"):
+            report = profiler.report()
+            st.dataframe(pd.DataFrame(report["phases"]).T, width = "stretch")
+            st.write(report["counters"])
+
+            if report["profile"]:
+                st.code(report["profile"])
+
+    # Profit Distribution Comparison
+    with st.container(border = True):
+        st.html("<b>Profit Distribution Comparison</b>")
+
+        with st.container(horizontal = True):
+            with st.container():
+                st.write("Fair Game Profit Distribution")
+                st.bar_chart(pd.DataFrame([player_profits_fair]), stack = False, y_label = "Frequency")
+
+            with st.container():
+                st.write("Tweaked Game Profit Distribution")
+                st.bar_chart(pd.DataFrame([player_profits_tweaked]), stack = False, y_label = "Frequency")
+
+    # House Edge & Win Rate
+    with st.container(border = True):
+        st.html("<b>House Edge and Win Rate</b>")
+        with st.container(horizontal = True):
+            with st.container():
+                st.write("House Edge")
+                st.bar_chart(
+                    pd.DataFrame(
+                        {
+                            "Fair Game": [house_edge_fair,],
+                            "Tweaked Game": [house_edge_tweaked,]
+                        }
+                    ),
+                    stack = False, y_label = "Perrcent (%)"
+                )
+
+            with st.container():
+                st.write("Win Rate")
+                st.bar_chart(
+                    pd.DataFrame(
+                        {
+                            "Fair Game": [fair_win_rate * 100,],
+                            "Tweaked Game": [tweaked_win_rate * 100,]
+                        }
+                    ),
+                    stack = False, y_label = "Perrcent (%)"
+                )
+
+# ============ PARAMETER SWEEP =============
+with st.expander(":material/grid_on: Parameter sweep"):
+    st.markdown("<b>Sweep settings</b>", unsafe_allow_html = True)
+
+    sweep_lights = st.multiselect("Number of Bulbs", list(range(12, 25)), default = [12, 16, 20, 24])
+    sweep_families = st.multiselect("Weight profiles", list(sweep.FAMILIES), default = ["power", "exponential"])
+    sweep_skews = st.multiselect("Skews", [0.0, 0.25, 0.5, 1.0, 1.5, 2.0, 3.0], default = [0.0, 0.5, 1.0, 2.0])
+    sweep_polls = st.number_input("Prize polls per configuration", 1, 20, value = 3, icon = ":material/attach_money:")
+    sweep_runs = st.number_input("Rounds per configuration", 1000, value = 100000, step = 10000, icon = ":material/timer_play:")
+
+    if st.button("Run sweep", icon = ":material/grid_on:"):
+        configs = sweep.grid(sweep_lights, sweep_families, sweep_skews, sweep_polls, st.session_state.SEED,
+                             bet = st.session_state.BET)
+
+        with st.spinner(f"Sweeping {len(configs)} configurations...", show_time = True):
+            table = sweep.run(configs, sweep_runs, st.session_state.SEED, workers = st.session_state.WORKERS)
+
+        if len(table) > 0:
+            st.dataframe(table, hide_index = True)
+
+            # Heatmaps averaged over prize polls, one column per weight profile
+            for metric, title in (("house_edge", "House Edge (%)"), ("win_rate", "Win Rate (%)")):
+                st.write(title)
+                fig, axes = plt.subplots(1, len(sweep_families), squeeze = False)
+                fig.set_size_inches(5 * len(sweep_families), 4)
+
+                for ax, family in zip(axes[0], sweep_families):
+                    pivot = table[table["family"] == family].pivot_table(index = "lights", columns = "skew", values = metric) * 100
+                    image = ax.imshow(pivot.values, aspect = "auto", origin = "lower", cmap = "viridis")
+                    ax.set_xticks(range(len(pivot.columns)), pivot.columns)
+                    ax.set_yticks(range(len(pivot.index)), pivot.index)
+                    ax.set_xlabel("Skew")
+                    ax.set_ylabel("Bulbs")
+                    ax.set_title(family)
+                    fig.colorbar(image, ax = ax)
 
+                st.pyplot(fig)
+                plt.close(fig)
@@ -0,0 +1,139 @@
+"""Betting strategies played side by side by a population of players.
+
+A strategy picks the bulbs to bet on and moves the stake per bulb after every
+round. The engine keeps a (strategies x players) state and steps through the
+rounds with whole-array operations, so every strategy and player advances at once.
+All strategies see the same spins of each player's wheel, so differences between
+them are not sampling noise.
+
+Bets are settled by the game's rules: every bet's amount goes to the house, and a
+bet on the selected bulb is paid that bulb's prize whatever its amount. Stake
+progressions therefore change what a player risks, not what they can win."""
+
+import numpy as np
+
+import simulation as sim
+
+class Strategy:
+    """Bets `stake` on each of `bulbs` every round.
+
+    `bulbs` is a list of bulb indices, or a function of the game returning one.
+    With the "martingale" progression the stake per bulb doubles after a round
+    without a winning bet and resets after a win; "anti_martingale" does the
+    opposite. Doubling stops at `max_doublings`."""
+    PROGRESSIONS = ("flat", "martingale", "anti_martingale")
+
+    def __init__(self, name: str, bulbs, stake: int = 250, progression: str = "flat", max_doublings: int = 6):
+        if progression not in self.PROGRESSIONS:
+            raise ValueError(f"Unknown stake progression: {progression}")
+
+        self.name = name
+        self.bulbs = bulbs
+        self.stake = stake
+        self.progression = progression
+        self.max_doublings = max_doublings
+
+    def slots(self, game: sim.Game) -> list[int]:
+        return list(self.bulbs(game) if callable(self.bulbs) else self.bulbs)
+
+def flat(bulb: int = 0, stake: int = 250) -> Strategy:
+    return Strategy(f"flat({bulb})", [bulb], stake)
+
+def martingale(bulb: int = 0, stake: int = 250, max_doublings: int = 6) -> Strategy:
+    return Strategy(f"martingale({bulb})", [bulb], stake, "martingale", max_doublings)
+
+def anti_martingale(bulb: int = 0, stake: int = 250, max_doublings: int = 6) -> Strategy:
+    return Strategy(f"anti_martingale({bulb})", [bulb], stake, "anti_martingale", max_doublings)
+
+def spread(k: int, stake: int = 250) -> Strategy:
+    """Bets on the `k` most likely bulbs."""
+    return Strategy(f"spread({k})", lambda game: np.argsort(-game.sampler.p, kind = "stable")[:k], stake)
+
+def chase(stake: int = 250) -> Strategy:
+    """Bets on the bulb with the highest prize."""
+    return Strategy("chase", lambda game: [int(np.argmax(game.prize_poll))], stake)
+
+class StrategyResult:
+    """Final state of every player under every strategy."""
+    def __init__(self, names: list[str], balance: int, final: np.ndarray, staked: np.ndarray, played: np.ndarray,
+                 ruined: np.ndarray):
+        self.names = names
+        self.balance = balance
+        self.final = final
+        self.staked = staked
+        self.played = played
+        self.ruined = ruined
+
+    def summary(self) -> list[dict]:
+        """Per strategy: mean and variance of the players' profit, return on the amount staked, ruin rate and rounds played."""
+        profit = self.final - self.balance
+        staked = self.staked.sum(axis = 1)
+
+        return [{
+            "strategy": name, "mean_profit": float(profit[i].mean()), "variance": float(profit[i].var()),
+            "return": float(profit[i].sum() / staked[i]) if staked[i] else 0.0,
+            "ruin": float(self.ruined[i].mean()), "rounds_played": float(self.played[i].mean())
+        } for i, name in enumerate(self.names)]
+
+class StrategyEngine:
+    """Plays `strategies` for `players` players each, starting from `balance`.
+
+    A player stops (is ruined) from the first round their balance cannot cover
+    the strategy's total stake."""
+    def __init__(self, game_model: sim.Game, strategies: list[Strategy], players: int = 10000, balance: int = 2000,
+                 random_seed: int = 42, max_cells: int = 1 << 22):
+        self.game = game_model
+        self.strategies = strategies
+        self.players = players
+        self.balance = balance
+        self.random_seed = random_seed
+        self.max_cells = max_cells
+
+    def run(self, rounds: int) -> StrategyResult:
+        lights = self.game.lights
+        prizes = np.asarray(self.game.prize_poll, dtype = np.int64)
+
+        # Per strategy: the bulbs bet on, the base stake per bulb and the progression.
+        covered = np.zeros((len(self.strategies), lights), dtype = bool)
+        for i, strategy in enumerate(self.strategies):
+            covered[i, strategy.slots(self.game)] = True
+
+        bets = covered.sum(axis = 1, keepdims = True)
+        base = np.array([[s.stake] for s in self.strategies], dtype = np.int64)
+        cap = base * 2 ** np.array([[s.max_doublings] for s in self.strategies], dtype = np.int64)
+        on_loss = np.array([[s.progression == "martingale"] for s in self.strategies])
+        on_win = np.array([[s.progression == "anti_martingale"] for s in self.strategies])
+
+        shape = (len(self.strategies), self.players)
+        balances = np.full(shape, self.balance, dtype = np.int64)
+        unit = np.broadcast_to(base, shape).copy()
+        staked = np.zeros(shape, dtype = np.int64)
+        played = np.zeros(shape, dtype = np.int64)
+        active = np.ones(shape, dtype = bool)
+
+        rng = np.random.default_rng(self.random_seed)
+        chunk = max(1, self.max_cells // self.players)
+
+        for start in range(0, rounds, chunk):
+            selected = self.game.sampler.sample(rng, (min(chunk, rounds - start), self.players))
+
+            for spin in selected:
+                stake = unit * bets
+                active &= balances >= stake
+                hit = covered[:, spin]
+
+                # Every bet's amount goes to the house; a bet on the selected bulb is paid its prize.
+                stake *= active
+                balances += hit * prizes[spin] * active - stake
+                staked += stake
+                played += active
+
+                unit = np.where(np.where(hit, on_win, on_loss), np.minimum(unit * 2, cap), base)
+
+            # Nothing changes once every player is out.
+            if not active.any():
+                break
+
+        # Players still in the game but unable to cover their next stake are ruined too.
+        ruined = ~active | (balances < unit * bets)
+        return StrategyResult([s.name for s in self.strategies], self.balance, balances, staked, played, ruined)
@@ -0,0 +1,119 @@
+"""Parameter sweeps across bulb counts, weight profiles and prize polls.
+
+Every configuration of a sweep is played from the same uniform draws (the same
+chunk streams as `Simulator.run()` with the sweep's seed), so differences between
+configurations are not drowned in sampling noise. Configurations are split across
+worker processes; each worker regenerates the shared draws, so the results do not
+depend on the number of workers."""
+
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import simulation as sim
+import analysis
+
+FAMILIES = ("uniform", "power", "exponential")
+
+def weight_profile(prize_poll: list[int], family: str, skew: float) -> list[float]:
+    """Weights that favor the low prizes of `prize_poll`, by `skew` (0 is uniform)."""
+    prizes = np.asarray(prize_poll, dtype = np.float64)
+
+    if family == "uniform" or skew == 0:
+        w = np.ones(len(prizes))
+    elif family == "power":
+        w = prizes ** -skew
+    elif family == "exponential":
+        w = np.exp(-skew * prizes / prizes.max())
+    else:
+        raise ValueError(f"Unknown weight family: {family}")
+
+    return list(w / w.sum())
+
+def prize_polls(lights: int, count: int, random_seed: int = 42) -> list[list[int]]:
+    """`count` prize polls for `lights` bulbs, drawn from `Game.c`."""
+    rng = np.random.default_rng([random_seed, lights])
+    return [[int(p) for p in rng.choice(sim.Game.c, lights)] for _ in range(count)]
+
+def grid(lights: list[int], families: list[str], skews: list[float], polls: int = 1, random_seed: int = 42,
+         stake: int = 250, bet: int = 0) -> list[dict]:
+    """Every combination of bulb count, weight family, skew and prize poll."""
+    configs = []
+
+    for n, family, skew in itertools.product(lights, families, skews):
+        for poll_id, poll in enumerate(prize_polls(n, polls, random_seed)):
+            configs.append({"lights": n, "family": family, "skew": skew, "poll": poll_id,
+                            "prize_poll": poll, "stake": stake, "bet": bet})
+
+    return configs
+
+def sample(count: int, lights: tuple[int, int] = (12, 24), skew: tuple[float, float] = (0.0, 2.0),
+           random_seed: int = 42, stake: int = 250, bet: int = 0) -> list[dict]:
+    """`count` random configurations."""
+    rng = np.random.default_rng(random_seed)
+    configs = []
+
+    for i in range(count):
+        n = int(rng.integers(lights[0], lights[1] + 1))
+        configs.append({"lights": n, "family": str(rng.choice(FAMILIES)), "skew": float(rng.uniform(*skew)),
+                        "poll": i, "prize_poll": [int(p) for p in rng.choice(sim.Game.c, n)],
+                        "stake": stake, "bet": bet})
+
+    return configs
+
+def make_game(config: dict) -> sim.Game:
+    if config["family"] == "uniform" or config["skew"] == 0:
+        game = sim.FairGame(config["lights"], prize_poll = config["prize_poll"])
+    else:
+        game = sim.TweakedGame(config["lights"], weight_profile(config["prize_poll"], config["family"], config["skew"]),
+                               prize_poll = config["prize_poll"])
+
+    game.bet(1, config["stake"], config["bet"])
+    return game
+
+def _evaluate(args):
+    """Process pool task: plays a batch of configurations on the shared draws."""
+    configs, rounds, random_seed, chunk_size = args
+    games = [make_game(c) for c in configs]
+    runner = sim.Simulator(games[0], rounds, random_seed)
+    paid = np.zeros(len(games))
+    wins = np.zeros(len(games), dtype = np.int64)
+
+    for index, start in enumerate(range(0, rounds, chunk_size)):
+        u = runner.uniforms(index, min(chunk_size, rounds - start))
+
+        for i, game in enumerate(games):
+            payout = game.settle(game.sampler.from_uniform(u))
+            paid[i] += payout.sum()
+            wins[i] += np.count_nonzero(payout)
+
+    rows = []
+    for config, game, total, won in zip(configs, games, paid, wins):
+        staked = game.stakes() * rounds
+        rows.append({
+            "lights": config["lights"], "family": config["family"], "skew": config["skew"], "poll": config["poll"],
+            "house_edge": (staked - total) / staked, "win_rate": won / rounds,
+            "exact_house_edge": analysis.house_edge(game), "exact_win_rate": analysis.win_rate(game),
+            "profit_per_round": (total - staked) / rounds
+        })
+
+    return rows
+
+def run(configs: list[dict], rounds: int = 100000, random_seed: int = 42, chunk_size: int = 1_000_000,
+        workers: int = 1) -> pd.DataFrame:
+    """Plays every configuration for `rounds` rounds and returns one row per configuration."""
+    if not configs:
+        return pd.DataFrame()
+
+    bounds = np.linspace(0, len(configs), max(1, min(workers, len(configs))) + 1).astype(int)
+    tasks = [(configs[a:b], rounds, random_seed, chunk_size) for a, b in zip(bounds[:-1], bounds[1:])]
+
+    if len(tasks) > 1:
+        with ProcessPoolExecutor(len(tasks)) as pool:
+            parts = list(pool.map(_evaluate, tasks))
+    else:
+        parts = [_evaluate(task) for task in tasks]
+
+    return pd.DataFrame([row for part in parts for row in part])
@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the top of the repository, next to the Streamlit pages.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import simulation as sim
+
+PRIZE_POLL = [20, 50, 100, 200, 500, 750, 1000, 20, 50, 100, 200, 500]
+WEIGHTS = [3, 3, 2, 2, 1, 1, 1, 1, 1, 1, 1, 1]
+
+@pytest.fixture
+def make_game():
+    """Factory of 12-bulb tweaked games on a fixed prize poll, with a bet of `stake` on each of `bets`."""
+    def make(weights: list[float] = WEIGHTS, bets: tuple[int, ...] = (0, 6), stake: int = 250) -> sim.Game:
+        game = sim.TweakedGame(12, weights, prize_poll = PRIZE_POLL)
+        for player, slot in enumerate(bets, 1):
+            game.bet(player, stake, slot)
+
+        return game
+
+    return make
@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+
+import simulation as sim
+import analysis
+
+# One bet on the 1000 prize, three times as likely as any other bulb.
+WEIGHTS = [1, 1, 1, 1, 1, 1, 3, 1, 1, 1, 1, 1]
+
+def test_moments_match_simulator(make_game):
+    game = make_game(WEIGHTS, (6,))
+    result = sim.Simulator(make_game(WEIGHTS, (6,)), 2_000_000, 1).run()
+    net = result.player_net.astype(np.float64)
+
+    assert abs(net.mean() - analysis.expected_value(game)) < 4 * np.sqrt(analysis.variance(game) / len(net))
+    assert abs(net.var() / analysis.variance(game) - 1) < 0.01
+    assert abs(result.win_rate() - analysis.win_rate(game)) < 0.002
+
+def test_ruin_matches_simulated_sessions(make_game):
+    game = make_game(WEIGHTS, (6,))
+    balance, target = 2000, 4000
+    solved = analysis.ruin(game, balance, target)
+
+    # Sessions played back to back on one Simulator stream, each from `balance`
+    # until the player cannot cover the stake or reaches `target`.
+    sessions, current, length = [], balance, 0
+    for net in sim.Simulator(make_game(WEIGHTS, (6,)), 400_000, 7).run().player_net.tolist():
+        current += net
+        length += 1
+
+        if current < game.stakes() or current >= target:
+            sessions.append((current < game.stakes(), length))
+            current, length = balance, 0
+
+    ruined, duration = np.array(sessions).T
+
+    assert len(sessions) > 10_000
+    assert abs(ruined.mean() - solved["ruin"]) < 0.015
+    assert abs(duration.mean() / solved["duration"] - 1) < 0.05
+    assert np.isclose(solved["ruin"] + solved["upper"], 1.0)
+
+def test_profit_distribution_is_the_n_fold_convolution(make_game):
+    game = make_game(WEIGHTS, (6, 0))
+    p, net = analysis.round_outcomes(game)
+
+    # Brute force over every sequence of 3 rounds.
+    expected = {}
+    for bulbs in np.ndindex(12, 12, 12):
+        profit = int(net[list(bulbs)].sum())
+        expected[profit] = expected.get(profit, 0.0) + float(np.prod(p[list(bulbs)]))
+
+    profits, probs = analysis.profit_distribution(game, 3)
+    found = dict(zip(profits.tolist(), probs.tolist()))
+
+    assert np.isclose(probs.sum(), 1.0)
+    assert set(expected) <= set(found)
+    assert all(abs(found.get(k, 0.0) - expected.get(k, 0.0)) < 1e-12 for k in set(found) | set(expected))
+
+    profits, probs = analysis.profit_distribution(game, 50)
+    mean = probs @ profits
+    assert np.isclose(mean, 50 * analysis.expected_value(game))
+    assert np.isclose(probs @ (profits - mean) ** 2, 50 * analysis.variance(game))
+
+def test_profit_distribution_matches_simulated_sessions(make_game):
+    n, sessions = 10, 100_000
+    profits, probs = analysis.profit_distribution(make_game(WEIGHTS, (6,)), n)
+    net = sim.Simulator(make_game(WEIGHTS, (6,)), n * sessions, 3).run().player_net
+    totals = net.reshape(sessions, n).sum(axis = 1)
+
+    # Every session total is a possible one, and the frequencies of the likelier ones match.
+    found = dict(zip(profits.tolist(), probs.tolist()))
+    values, counts = np.unique(totals, return_counts = True)
+    assert all(found.get(v, 0.0) > 0 for v in values.tolist())
+
+    expected = np.array([found[v] for v in values.tolist()]) * sessions
+    likely = expected > 100
+    assert np.all(np.abs(counts[likely] - expected[likely]) < 5 * np.sqrt(expected[likely]))
+
+def greedy_edges(game, low, high) -> tuple[float, float]:
+    # With box bounds, the extreme edges put every spare bit of probability on the best bulbs in turn.
+    _, net = analysis.round_outcomes(game)
+    edges = []
+    for order in (np.argsort(-net), np.argsort(net)):
+        p = np.full(game.lights, low)
+        spare = 1 - p.sum()
+        for bulb in order:
+            p[bulb] += min(high - low, spare)
+            spare -= p[bulb] - low
+
+        edges.append(-(p @ net) / game.stakes())
+
+    return edges[0], edges[1]
+
+@pytest.mark.parametrize("bounds", [{}, {"min_p": 0.05, "max_p": 0.15}, {"max_deviation": 0.02}])
+def test_optimized_weights_hit_the_edge_within_bounds(make_game, bounds):
+    game = make_game()
+    low, high = analysis.edge_range(game, **bounds)
+    uniform = 1 / game.lights
+    spread = bounds.get("max_deviation", 1.0)
+    expected = greedy_edges(game, max(bounds.get("min_p", 0.0), uniform - spread, 0.0),
+                            min(bounds.get("max_p", 1.0), uniform + spread))
+
+    assert np.allclose((low, high), expected)
+
+    for edge in np.linspace(low, high, 5):
+        weights = analysis.optimize_weights(game, edge, **bounds)
+        p = np.asarray(weights)
+
+        assert np.isclose(p.sum(), 1.0)
+        assert np.all(p >= bounds.get("min_p", 0.0) - 1e-9) and np.all(p <= bounds.get("max_p", 1.0) + 1e-9)
+        assert np.all(np.abs(p - uniform) <= spread + 1e-9)
+
+        game.weights = weights
+        assert abs(analysis.house_edge(game) - edge) < 1e-9
+
+    for edge in (low - 0.01, high + 0.01):
+        with pytest.raises(ValueError):
+            analysis.optimize_weights(game, edge, **bounds)
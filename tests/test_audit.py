@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+import simulation as sim
+import audit
+import cli
+
+def audit_run(declared: sim.Game, played: sim.Game, n: int = 500_000) -> audit.Audit:
+    return audit.Audit(declared).feed(s for s, _ in sim.Simulator(played, n, 12).chunks(n, 100_000))
+
+def test_declared_weights_pass(make_game):
+    checked = audit_run(make_game(), make_game())
+    report = checked.report()
+
+    assert report["chi_square_p"] > 0.01 and report["g_test_p"] > 0.01
+    assert np.abs(report["z_scores"]).max() < 4
+    assert abs(report["house_edge"] - report["declared_house_edge"]) < 2 * report["half_width"]
+
+def test_mis_weighted_wheel_fails(make_game):
+    # Declared fair, but bulb 0 is twice as likely as it should be.
+    checked = audit_run(make_game([1] * 12), make_game([2] + [1] * 11))
+    report = checked.report()
+
+    assert report["chi_square_p"] < 1e-6 and report["g_test_p"] < 1e-6
+    assert report["z_scores"].argmax() == 0
+
+def test_impossible_bulb_fails_outright(make_game):
+    checked = audit.Audit(make_game([0] + [1] * 11))
+    checked.update(np.arange(1, 12).repeat(100))
+    assert checked.chi_square()[1] > 0.99 and checked.g_test()[1] > 0.99
+
+    checked.update(np.array([0]))
+    assert checked.chi_square() == (float("inf"), 0.0)
+    assert checked.g_test() == (float("inf"), 0.0)
+    assert checked.z_scores()[0] == 0.0
+
+def test_bulbs_off_the_wheel_are_rejected(make_game):
+    with pytest.raises(ValueError):
+        audit.Audit(make_game()).update(np.array([3, 12]))
+
+def test_ingest_counts_every_format_alike(tmp_path, make_game):
+    n = 50_000
+    trace = sim.Simulator(make_game(), n, 2).record(str(tmp_path / "trace"), n, 8_000)
+    selected = trace.read("selected", 0, n)
+    np.save(str(tmp_path / "selected.npy"), selected)
+
+    writer = cli.CsvWriter(str(tmp_path / "rounds.csv"))
+    for chunk in trace.chunks():
+        writer.write(*chunk)
+    writer.close()
+
+    expected = np.bincount(selected, minlength = 12)
+    for path in ("trace", "selected.npy", "rounds.csv"):
+        checked = audit.Audit(make_game()).ingest(str(tmp_path / path), chunk_rows = 7_000)
+
+        assert checked.n == n
+        assert np.array_equal(checked.counts, expected)
@@ -0,0 +1,39 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import simulation as sim
+import cache
+
+def make_result(seed: int, n: int = 10_000) -> sim.SimulationResult:
+    rng = np.random.default_rng(seed)
+    return sim.SimulationResult(rng.integers(0, 12, n), rng.integers(0, 1000, n), 250, 12)
+
+def test_evicted_disk_entry_is_a_miss(tmp_path):
+    results = cache.ResultCache(memory_bytes = 0, directory = str(tmp_path))
+    results.put("a", make_result(1))
+    os.remove(os.path.join(str(tmp_path), "a.npz"))
+
+    assert results.get("a") is None
+    assert results.stats()["misses"] == 1
+
+def test_shared_between_threads(tmp_path):
+    entry = cache.result_size(make_result(0))
+    results = cache.ResultCache(memory_bytes = 3 * entry, directory = str(tmp_path), disk_bytes = 4 * entry // 5)
+
+    def session(i):
+        for j in range(40):
+            key = str((i + j) % 6)
+            if results.get(key) is None:
+                results.put(key, make_result(int(key)))
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(session, range(8)))
+
+    stats = results.stats()
+    assert stats["memory_hits"] + stats["disk_hits"] + stats["misses"] == 8 * 40
+    assert stats["memory_bytes"] == sum(cache.result_size(r) for r in results.memory.values())
+    assert stats["memory_bytes"] <= 3 * entry
+    for key, result in results.memory.items():
+        assert np.array_equal(result.selected, make_result(int(key)).selected)
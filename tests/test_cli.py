@@ -0,0 +1,16 @@
+import pytest
+
+import cli
+
+@pytest.mark.parametrize("args", [["--rounds", "0"], ["--chunk-size", "0"], ["--bet", "12"], ["--bet", "-1"],
+                                  ["--lights", "14", "--bet", "14"]])
+def test_invalid_arguments_are_usage_errors(args, capsys):
+    with pytest.raises(SystemExit) as exit:
+        cli.main(["run", *args])
+
+    assert exit.value.code == 2
+    assert "error:" in capsys.readouterr().err
+
+def test_bet_on_the_last_bulb(capsys):
+    assert cli.main(["run", "--rounds", "1000", "--bet", "11", "--json"]) == 0
+    assert '"rounds": 1000' in capsys.readouterr().out
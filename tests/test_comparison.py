@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+import analysis
+import comparison
+
+MODES = [{}, {"antithetic": True}, {"control": True}, {"antithetic": True, "control": True}]
+
+@pytest.mark.parametrize("mode", MODES)
+def test_estimate_is_unbiased(make_game, mode):
+    fair, tweaked = make_game([1] * 12), make_game()
+    exact = analysis.expected_value(tweaked) - analysis.expected_value(fair)
+
+    estimates = np.array([comparison.compare(fair, tweaked, 2_000, seed, chunk_size = 500, **mode)["difference"]
+                          for seed in range(400)])
+
+    # The mean of many independent estimates is within four of its standard errors.
+    assert abs(estimates.mean() - exact) < 4 * estimates.std() / np.sqrt(len(estimates))
+
+@pytest.mark.parametrize("mode", MODES)
+def test_reported_spread_and_variance_reduction(make_game, mode):
+    fair, tweaked = make_game([1] * 12), make_game()
+    n = 10_000
+    runs = [comparison.compare(fair, tweaked, n, seed, chunk_size = 2_500, **mode) for seed in range(300)]
+    estimates = np.array([r["difference"] for r in runs])
+
+    # Against the spread of the estimates themselves, and against two independent runs of n rounds.
+    assert abs(np.mean([r["half_width"] for r in runs]) / 1.96 / estimates.std() - 1) < 0.2
+    independent = (analysis.variance(fair) + analysis.variance(tweaked)) / n
+    assert abs(np.mean([r["variance_reduction"] for r in runs]) / (independent / estimates.var()) - 1) < 0.3
+    assert min(r["variance_reduction"] for r in runs) > 1
+
+def test_antithetic_plays_every_round(make_game):
+    fair, tweaked = make_game([1] * 12), make_game()
+
+    assert comparison.compare(fair, tweaked, 10_001, chunk_size = 1_001, antithetic = True)["rounds"] == 10_001
+    with pytest.raises(ValueError):
+        comparison.compare(fair, tweaked, 1, antithetic = True)
@@ -0,0 +1,81 @@
+import numpy as np
+
+import simulation as sim
+import floor
+
+def make_floor(make_game, max_cells: int) -> tuple[floor.Floor, list[sim.Game]]:
+    # Tables of different sizes, weights, bets and banks. The second favours its
+    # player's 1000 prize and runs dry within the run; the last starts closed.
+    games = [make_game(), make_game([1, 1, 1, 1, 1, 1, 10, 1, 1, 1, 1, 1], (6,)),
+             make_game([5, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1], (0, 6, 5))]
+    games.append(sim.TweakedGame(14, [1] * 13 + [0], prize_poll = [100] * 14))
+    games[-1].bet(1, 250, 13)
+    games[-1].bet(2, 250, 3)
+
+    for game, bank in zip(games, (2_000, 1_000, 10_000, 50)):
+        game.initial_bank = bank
+
+    return floor.Floor.from_games(games, random_seed = 5, max_cells = max_cells), games
+
+def reference_run(games, rounds: int, chunk: int):
+    """Table by table and round by round, from the same uniform draws as `Floor.run()`."""
+    rng = np.random.default_rng(5)
+    u = np.concatenate([rng.random((min(chunk, rounds - start), len(games))) for start in range(0, rounds, chunk)])
+    banks = np.empty((len(games), rounds), dtype = np.int64)
+    exhausted_at = np.full(len(games), -1)
+
+    for t, game in enumerate(games):
+        selected = game.sampler.from_uniform(u[:, t])
+        prizes = np.asarray(game.prize_poll) * game.book.winners()
+        bank = game.initial_bank
+
+        for r in range(rounds):
+            if exhausted_at[t] < 0 and bank < prizes.max():
+                exhausted_at[t] = r
+
+            if exhausted_at[t] < 0:
+                bank += game.stakes() - int(prizes[selected[r]])
+
+            banks[t, r] = bank
+
+    return banks, exhausted_at
+
+def test_sample_matches_each_tables_sampler(make_game):
+    tables, games = make_floor(make_game, 1 << 22)
+    selected = tables.sample(np.random.default_rng(3), 5_000)
+    u = np.random.default_rng(3).random((5_000, len(games)))
+
+    for t, game in enumerate(games):
+        assert np.array_equal(selected[:, t], game.sampler.from_uniform(u[:, t]))
+
+def test_run_matches_a_reference_loop(make_game):
+    rounds, chunk = 300, 7
+    tables, games = make_floor(make_game, chunk * 4)
+    result = tables.run(rounds, keep_trajectories = True)
+    banks, exhausted_at = reference_run(games, rounds, chunk)
+
+    assert np.array_equal(result.trajectories, banks)
+    assert np.array_equal(result.final, banks[:, -1])
+    assert np.array_equal(result.exhausted_at, exhausted_at)
+    assert np.allclose(result.mean, banks.mean(axis = 0))
+    assert np.array_equal(result.total, banks.sum(axis = 0))
+    assert np.allclose(result.quantiles, np.quantile(banks, result.levels, axis = 0))
+
+def test_closed_tables_stay_closed(make_game):
+    rounds, chunk = 300, 7
+    tables, games = make_floor(make_game, chunk * 4)
+    result = tables.run(rounds, keep_trajectories = True)
+    _, exhausted_at = reference_run(games, rounds, chunk)
+
+    # The 50 bank cannot cover a 100 prize from the start.
+    assert result.exhausted_at[3] == 0
+    assert 0 < result.exhausted_at[1] < rounds
+    assert 0.25 < result.closed[-1] < 1
+    assert np.array_equal(result.exhausted(), np.nonzero(exhausted_at >= 0)[0])
+
+    expected = [(exhausted_at >= 0) & (exhausted_at <= r) for r in range(rounds)]
+    assert np.allclose(result.closed, np.mean(expected, axis = 1))
+
+    for t in result.exhausted():
+        frozen = result.trajectories[t, result.exhausted_at[t]:]
+        assert np.all(frozen == frozen[0])
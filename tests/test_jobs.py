@@ -0,0 +1,36 @@
+import functools
+import time
+
+import numpy as np
+
+import simulation as sim
+import comparison
+import jobs
+
+def test_cancel_stops_the_paired_comparison(make_game):
+    # A billion rounds would take minutes; cancelled, the task stops at its next chunk.
+    task = functools.partial(comparison.compare, make_game([1] * 12), make_game(), 10 ** 9, chunk_size = 100_000)
+    job = jobs.SimulationJob({}, tasks = {"paired": task})
+    future = job._tasks["paired"]
+
+    while not future.running():
+        time.sleep(0.01)
+
+    time.sleep(0.2)
+    job.cancel()
+    assert job.collect() is None
+    assert future.result(timeout = 10) is None
+
+def test_traced_runs_match_plain_ones(tmp_path, make_game):
+    n, chunk_size = 60_000, 20_000
+    simulators = {name: sim.Simulator(make_game(), n, 8) for name in ("plain", "traced")}
+    job = jobs.SimulationJob(simulators, chunk_size, traces = {"traced": str(tmp_path / "traced")})
+
+    while not job.done():
+        time.sleep(0.01)
+
+    results = job.collect()
+    assert isinstance(results["traced"], sim.Trace)
+    assert results["traced"].total_profit() == results["plain"].total_profit()
+    assert np.array_equal(results["traced"].hit_counts(), results["plain"].hit_counts())
+    assert simulators["traced"].game.initial_bank == simulators["plain"].game.initial_bank
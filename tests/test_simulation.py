@@ -0,0 +1,186 @@
+import os
+
+import numpy as np
+import pytest
+
+import simulation as sim
+import population
+
+def assert_same_result(a: sim.SimulationResult, b: sim.SimulationResult):
+    assert np.array_equal(a.selected, b.selected)
+    assert np.array_equal(a.payout, b.payout)
+
+def test_sampler_maps_multi_dimensional_draws(make_game):
+    sampler = make_game().sampler
+    u = np.random.default_rng(1).random((50, 1000))
+
+    selected = sampler.from_uniform(u)
+
+    assert selected.shape == u.shape
+    assert np.array_equal(selected.ravel(), sampler.from_uniform(u.ravel()))
+    assert np.array_equal(selected.ravel(), np.minimum(sampler.cdf.searchsorted(u.ravel(), side = "right"), 11))
+    assert sampler.sample(np.random.default_rng(1), (50, 1000)).shape == (50, 1000)
+
+def test_population_runs_with_two_dimensional_draws(make_game):
+    result = population.Population(make_game(), players = 1000).run(50)
+
+    assert len(result) == 50
+
+def test_weights_cannot_be_edited_behind_the_sampler(make_game):
+    game = make_game()
+    sampler = game.sampler
+
+    with pytest.raises(TypeError):
+        game.weights[0] = 5.0
+
+    game.weights = [1] * 12
+    assert game.sampler is not sampler
+    assert np.allclose(game.sampler.p, 1 / 12)
+
+def test_batch_run_matches_play(make_game):
+    # One chunk draws from the same stream that `play()` gets from chunk 0's generator.
+    n = 20_000
+    batch, single = make_game(), make_game()
+    result = sim.Simulator(batch, n, 7).run(n, chunk_size = n)
+
+    simulator = sim.Simulator(single, n, 7)
+    single.rng = simulator.chunk_rng(0)
+    selected, payout = [], []
+    for _ in range(n):
+        payout.append(sum(single.play().values()))
+        selected.append(single.selected)
+
+    assert np.array_equal(result.selected, selected)
+    assert np.array_equal(result.payout, payout)
+    assert batch.initial_bank == single.initial_bank
+
+def test_results_do_not_depend_on_workers(make_game):
+    n, chunk_size = 250_000, 30_000
+    one, many = make_game(), make_game()
+
+    expected = sim.Simulator(one, n, 3).run(n, chunk_size)
+    result = sim.Simulator(many, n, 3).run(n, chunk_size, workers = 3)
+
+    assert_same_result(result, expected)
+    assert many.initial_bank == one.initial_bank
+
+    streamed = make_game()
+    chunks = list(sim.Simulator(streamed, n, 3).chunks(n, chunk_size, workers = 2))
+    assert np.array_equal(np.concatenate([s for s, _ in chunks]), expected.selected)
+    assert streamed.initial_bank == one.initial_bank
+
+def test_rerun_matches_fresh_run(make_game):
+    n, chunk_size = 100_000, 30_000
+    weights = [1, 1, 1, 1, 1, 1, 4, 1, 1, 1, 1, 1]
+
+    simulator = sim.Simulator(make_game(), n, 5, uniform_cache = n)
+    simulator.run(n, chunk_size)
+    rerun = simulator.rerun(weights, n, chunk_size)
+
+    fresh_game = make_game(weights)
+    fresh = sim.Simulator(fresh_game, n, 5).run(n, chunk_size)
+
+    assert_same_result(rerun, fresh)
+    assert simulator.game.initial_bank == fresh_game.initial_bank
+
+@pytest.mark.parametrize("first", [40_000, 45_000, 100_000])
+def test_resumed_run_is_bit_identical(tmp_path, first, make_game):
+    n, chunk_size = 100_000, 10_000
+    path = str(tmp_path / "run.json")
+
+    # A shorter run (ending inside a chunk for 45_000) extended to `n` rounds.
+    partial = sim.Simulator(make_game(), first, 11)
+    partial.run_resumable(path, first, chunk_size, checkpoint_every = 2)
+    resumed_game = make_game()
+    resumed = sim.Simulator(resumed_game, n, 11).run_resumable(path, n, chunk_size, checkpoint_every = 2)
+
+    whole_game = make_game()
+    whole = sim.Simulator(whole_game, n, 11).run_resumable(str(tmp_path / "whole.json"), n, chunk_size)
+
+    assert resumed.state() == whole.state()
+    assert resumed_game.initial_bank == whole_game.initial_bank
+
+    expected = sim.Simulator(make_game(), n, 11).run(n, chunk_size)
+    assert resumed.total == expected.total_profit()
+    assert np.array_equal(resumed.hits, expected.hit_counts())
+
+def test_trace_matches_result_and_stays_read_only(tmp_path, make_game):
+    n, chunk_size = 50_000, 8_000
+    expected = sim.Simulator(make_game(), n, 9).run(n, chunk_size)
+    trace = sim.Simulator(make_game(), n, 9).record(str(tmp_path / "trace"), n, chunk_size)
+    files = sorted(os.listdir(str(tmp_path / "trace")))
+
+    cumulative = trace.cumulative_profit(str(tmp_path / "cumulative.npy"))
+
+    assert np.array_equal(cumulative, expected.cumulative_profit())
+    assert sorted(os.listdir(str(tmp_path / "trace"))) == files
+    assert trace.total_profit() == expected.total_profit()
+    assert np.array_equal(trace.hit_counts(), expected.hit_counts())
+
+def test_running_stats_stay_exact_for_a_large_bet_book(make_game):
+    # 20,000 bets of 250: the squared net profit of a chunk overflows int64 if summed per round.
+    game = make_game(bets = ())
+    for player in range(20_000):
+        game.bet(player, 250, player % 12)
+
+    stats = sim.Simulator(game, 2_000_000, 4).run_until(1e-9, 2_000_000, chunk_size = 1_000_000)
+    net = sim.Simulator(game, 2_000_000, 4).run(chunk_size = 1_000_000).player_net.tolist()
+
+    assert stats.n == len(net)
+    assert stats.total == sum(net)
+    assert stats.squares == sum(v * v for v in net)
+    assert stats.variance() > 0
+    assert np.isfinite(stats.half_width())
+
+    # With a reachable precision the run stops after the first chunk.
+    early = sim.Simulator(game, 2_000_000, 4).run_until(0.01, 2_000_000, chunk_size = 1_000_000)
+    assert early.n == 1_000_000
+
+def test_amounts_past_int32_do_not_wrap(make_game, tmp_path):
+    n = 10_000
+    game = make_game(stake = 2 ** 31)
+    bank = game.initial_bank
+
+    result = sim.Simulator(game, n, 6).run(n, chunk_size = 3_000)
+    trace = sim.Simulator(make_game(stake = 2 ** 31), n, 6).record(str(tmp_path / "trace"), n, chunk_size = 3_000)
+
+    assert np.all(result.bank_delta > 0)
+    assert result.bank_total() == 2 ** 32 * n - int(result.payout.sum())
+    assert game.initial_bank == bank + result.bank_total()
+    assert trace.total_profit() == result.total_profit()
+
+def test_recording_leaves_the_uniform_cache_alone(tmp_path, make_game):
+    n = 20_000
+    simulator = sim.Simulator(make_game(), n, 2, uniform_cache = n)
+    simulator.record(str(tmp_path / "trace"), n, chunk_size = 5_000)
+
+    assert simulator._cached_rounds == 0 and not simulator._uniforms
+    simulator.run(n, chunk_size = 5_000)
+    assert simulator._cached_rounds == n
+
+def test_worker_phases_reach_the_callers_profiler(make_game):
+    n, chunk_size = 100_000, 10_000
+    simulator = sim.Simulator(make_game(), n, 3)
+    simulator.instrument(sim.Profiler())
+    simulator.run(n, chunk_size, workers = 2)
+    list(simulator.chunks(n, chunk_size, workers = 2))
+
+    phases = simulator.profiler.report()["phases"]
+    assert phases["sample"]["rounds"] == phases["settle"]["rounds"] == 2 * n
+    assert phases["sample"]["calls"] == 2 * n // chunk_size
+    assert simulator.profiler.counters["bets_settled"] == 2 * 2 * n
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_cancelled_run_leaves_the_bank_alone(tmp_path, make_game, workers):
+    game = make_game()
+    bank = game.initial_bank
+    simulator = sim.Simulator(game, 50_000, 1)
+
+    with pytest.raises(sim.Cancelled):
+        simulator.run(50_000, 10_000, workers = workers, progress = lambda rounds: rounds < 20_000)
+    assert game.initial_bank == bank
+
+    with pytest.raises(sim.Cancelled):
+        simulator.record(str(tmp_path / "trace"), 50_000, 10_000, workers = workers,
+                         progress = lambda rounds: rounds < 20_000)
+    assert game.initial_bank == bank
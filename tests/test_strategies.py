@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+import strategies
+
+NEVER = [0] + [1] * 11    # Bulb 0 is never selected.
+ALWAYS = [1] + [0] * 11   # Bulb 0 is always selected.
+
+def strategy_set(max_doublings: int = 3) -> list[strategies.Strategy]:
+    return [strategies.flat(0), strategies.martingale(0, max_doublings = max_doublings),
+            strategies.anti_martingale(0, max_doublings = max_doublings)]
+
+@pytest.mark.parametrize("weights, progressions", [
+    (NEVER, [[250] * 6, [250, 500, 1000, 2000, 2000, 2000], [250] * 6]),
+    (ALWAYS, [[250] * 6, [250] * 6, [250, 500, 1000, 2000, 2000, 2000]])
+])
+def test_stakes_double_up_to_the_cap(make_game, weights, progressions):
+    # With a bank too large to run out, the amount staked is the sum of the progression.
+    result = strategies.StrategyEngine(make_game(weights), strategy_set(), players = 3, balance = 10 ** 6).run(6)
+
+    assert result.staked.tolist() == [[sum(p)] * 3 for p in progressions]
+    assert not result.ruined.any()
+
+def test_progressions_match_a_reference_loop(make_game):
+    game = make_game()
+    rounds, players, balance = 200, 50, 3_000
+    result = strategies.StrategyEngine(game, strategy_set(), players, balance, random_seed = 4).run(rounds)
+    spins = game.sampler.sample(np.random.default_rng(4), (rounds, players))
+    prize = game.prize_poll[0]
+
+    for i, progression in enumerate(("flat", "martingale", "anti_martingale")):
+        for player in range(players):
+            bank, unit, staked, played = balance, 250, 0, 0
+
+            for spin in spins[:, player]:
+                if bank < unit:
+                    break
+
+                won = spin == 0
+                bank += (prize if won else 0) - unit
+                staked += unit
+                played += 1
+
+                # Double after a loss (martingale) or a win (anti-martingale), otherwise back to the base stake.
+                doubles = progression == ("anti_martingale" if won else "martingale")
+                unit = min(2 * unit, 250 * 2 ** 3) if doubles else 250
+
+            assert result.final[i, player] == bank
+            assert result.staked[i, player] == staked
+            assert result.played[i, player] == played
+            assert result.ruined[i, player] == (bank < unit)
+
+def test_ruin_on_a_losing_wheel(make_game):
+    # Bulb 0 never lights up: flat loses 250 four times, martingale stakes 250 and 500 but cannot cover 1000.
+    result = strategies.StrategyEngine(make_game(NEVER), strategy_set(), players = 5, balance = 1_000).run(10)
+    summary = {s["strategy"]: s for s in result.summary()}
+
+    assert result.final.tolist() == [[0] * 5, [250] * 5, [0] * 5]
+    assert [summary[name]["rounds_played"] for name in result.names] == [4, 2, 4]
+    assert [summary[name]["ruin"] for name in result.names] == [1, 1, 1]
+    assert [summary[name]["return"] for name in result.names] == [-1, -1, -1]